@@ -0,0 +1,268 @@
+import asyncio
+import inspect
+import io
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, BinaryIO, Callable, Iterable, Iterator, List, Tuple, Union
+
+from .cache import dokku_subcommand
+from .dokku_cli import Dokku
+from .models import Command
+from .utils import DEFAULT_SPOOL_MAX_MEMORY, Stdin, check_result, is_text_stdin, iter_stdin, stdin_file
+
+# Results of the commands already executed by the method being run by `AsyncDokku.call` (`None` outside of it)
+_replay: ContextVar[Union[dict, None]] = ContextVar("pydokku_replay", default=None)
+
+
+class CommandPending(BaseException):
+    """Raised by `AsyncDokku._execute` when a command must be awaited before the method can continue
+
+    It's a `BaseException` (as `GeneratorExit`) so it won't be caught by any `except Exception` in the plugin methods.
+    """
+
+    def __init__(self, command: Command, binary: bool = False, batch: Union[List[Command], None] = None):
+        super().__init__(command)
+        self.command = command
+        self.binary = binary  # stdout must be kept as bytes (for `execute_spooled`)
+        self.batch = batch if batch is not None else [command]  # Commands to be awaited in sequence (`execute_many`)
+
+
+async def execute_command_async(
+    command: List[str], stdin: Stdin = None, check: bool = True, binary: bool = False
+) -> Tuple[int, Union[str, bytes], str]:
+    """Same as `utils.execute_command`, but using `asyncio.create_subprocess_exec` (stdout is bytes if `binary`)"""
+    input_file, must_close = stdin_file(stdin)
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=input_file if input_file is not None else asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    finally:
+        if must_close:
+            input_file.close()
+    if input_file is not None or is_text_stdin(stdin) or isinstance(stdin, bytes):
+        data = stdin if isinstance(stdin, bytes) else (stdin.encode("utf-8") if isinstance(stdin, str) else None)
+        stdout, stderr = await process.communicate(input=data)
+    else:  # Stream the chunks, so the whole input is never in memory
+
+        async def write():
+            try:
+                for chunk in iter_stdin(stdin):
+                    process.stdin.write(chunk)
+                    await process.stdin.drain()
+                process.stdin.close()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        _, (stdout, stderr) = await asyncio.gather(
+            write(), asyncio.gather(process.stdout.read(), process.stderr.read())
+        )
+        await process.wait()
+    result, stderr = process.returncode, stderr.decode("utf-8")
+    if not binary:
+        stdout = stdout.decode("utf-8")
+    if check:
+        check_result(command, result, stdout, stderr)
+    return result, stdout, stderr
+
+
+class AsyncPlugin:
+    """Expose the methods of a plugin as coroutines (like `await dokku.apps.list()`)
+
+    `list` awaits the command returned by the plugin's `_list_command` and parses the result with `_list_parse` (the
+    plugins which don't implement them are run by `AsyncDokku.call`), and `set` awaits the commands returned with
+    `execute=False`. The other methods are run by `call` and the generator ones (like `object_create_many`) are
+    consumed by it, so the coroutine returns a list. When called from inside another method already being run by
+    `call` (like `ports.list`, which calls `apps.list`), the methods behave as the regular synchronous ones.
+    """
+
+    def __init__(self, dokku: "AsyncDokku", plugin):
+        self._dokku = dokku
+        self._plugin = plugin
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._plugin, name)
+        if name.startswith("_") or not callable(value):
+            return value
+        is_generator = inspect.isgeneratorfunction(value)
+
+        def method(*args, **kwargs):
+            if _replay.get() is not None:
+                return value(*args, **kwargs)
+            elif is_generator:  # Iterating outside `call` would execute the commands synchronously
+                return self._dokku.call(lambda: list(value(*args, **kwargs)))
+            return self._dokku.call(value, *args, **kwargs)
+
+        return method
+
+    def list(self, *args, **kwargs):
+        if _replay.get() is not None:
+            return self._plugin.list(*args, **kwargs)
+        return self._list(*args, **kwargs)
+
+    async def _list(self, *args, **kwargs):
+        # Building the command and parsing the result may need other commands (like `dokku version`), so `call` is used
+        command = await self._dokku.call(self._plugin._list_command, *args, **kwargs)
+        if command is None:
+            return await self._dokku.call(self._plugin.list, *args, **kwargs)
+        result = await self._dokku.execute(command)
+        return await self._dokku.call(self._plugin._list_parse, result, *args, **kwargs)
+
+    def report(self, *args, **kwargs):
+        """The plugin's `report` or, if it has none, `list` (which executes `:report` for most of the plugins)"""
+        if hasattr(self._plugin, "report"):
+            return self.__getattr__("report")(*args, **kwargs)
+        return self.list(*args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        bound = inspect.signature(self._plugin.set).bind(*args, **kwargs)
+        if _replay.get() is not None or not bound.arguments.get("execute", True):
+            return self.__getattr__("set")(*args, **kwargs)
+        bound.arguments["execute"] = False
+        return self._set(bound)
+
+    async def _set(self, bound: inspect.BoundArguments):
+        commands = await self._dokku.call(self._plugin.set, *bound.args, **bound.kwargs)
+        results = []
+        for command in commands if isinstance(commands, list) else [commands]:  # Some plugins use one command per app
+            result = await self._dokku.execute(command)
+            self._plugin.check_result(command, *result)
+            results.append(result[1])
+        return results if isinstance(commands, list) else results[0]
+
+    def __repr__(self):
+        return f"<AsyncPlugin {self._plugin.__class__.__name__}>"
+
+
+class AsyncDokku(Dokku):
+    """Interfaces with Dokku using the `dokku` command, executing them with `asyncio` subprocesses
+
+    The plugins' methods are coroutines, so many apps can be queried concurrently without a thread per call:
+
+        dokku = AsyncDokku()
+        apps = await dokku.apps.list()
+        reports = await asyncio.gather(*[dokku.ps.list(app.name) for app in apps])
+
+    The same `Command` objects and `_prepare_command` logic (sudo/SSH) as in `Dokku` are used, as well as the cache
+    (`cache=True`): read-only results are reused and writes invalidate them, even if the cache is shared with a
+    `Dokku` instance. The plugins' `list` and `set` await their commands directly (see `AsyncPlugin`). For the other
+    methods, the parsing code of the plugins is reused by running the synchronous method and, each time it needs the
+    result of a command that wasn't executed yet, awaiting the command and running the method again (replaying the
+    results already got). So, for the methods run by `call`:
+
+    - The commands must be the same in each run (no random values in them) and anything done between commands (like
+      creating temporary files) is done again in each run;
+    - A method which executes k commands one by one is run k + 1 times. The commands passed to `execute_many` are
+      awaited together (one run for the whole batch);
+    - The commands of one method are executed sequentially. Use `asyncio.gather` on many method calls to execute
+      commands concurrently.
+    """
+
+    def _create_plugin(self, klass) -> AsyncPlugin:
+        return AsyncPlugin(dokku=self, plugin=super()._create_plugin(klass))
+
+    async def execute(self, command: Command, binary: bool = False) -> Tuple[int, Union[str, bytes], str]:
+        # Same cache logic as `Dokku._execute` (binary outputs are never cached)
+        cacheable = not binary and self.cache is not None and self.cache.is_cacheable(command)
+        if cacheable:
+            key = self._cache_key(command)
+            result = self.cache.get(key)
+            if result is not None:
+                return result
+        try:
+            result = await self._execute_async(command, binary=binary)
+        finally:  # Even failed commands may have changed something
+            if not cacheable:
+                self._invalidate_cache(command)
+        if cacheable and result[0] == 0:
+            self.cache.set(key, dokku_subcommand(command), result, params=command.command[2:])
+        return result
+
+    @asynccontextmanager
+    async def _ssh_channel_async(self) -> AsyncIterator[List[str]]:
+        """Same as `_ssh_channel`, but choosing the master (which may wait for it to start) in a thread"""
+        if self._ssh_pool is None:
+            yield self._ssh_prefix
+            return
+        index = await asyncio.to_thread(self._ssh_pool.acquire)
+        try:
+            yield self._ssh_pool.commands[index] + ["--"]
+        finally:
+            self._ssh_pool.release(index)
+
+    async def _execute_async(self, command: Command, binary: bool = False) -> Tuple[int, Union[str, bytes], str]:
+        async with self._ssh_channel_async() as ssh_prefix:
+            cmd = ssh_prefix + self._prepare_command(command, include_ssh=False)
+            event = self._command_started(command, cmd)
+            result = await execute_command_async(command=cmd, stdin=command.stdin, check=False, binary=binary)
+        if binary:
+            self._command_finished(event, (result[0], "", result[2]), stdout_bytes=len(result[1]))
+        else:
+            self._command_finished(event, result)
+        if command.check:
+            check_result(cmd, *result)
+        return result
+
+    def _execute(self, command: Command) -> Tuple[int, str, str]:
+        state = _replay.get()
+        if state is None:  # Not running inside `call`, so execute synchronously
+            return super()._execute(command)
+        return self._replay_result(state, command)
+
+    def execute_spooled(
+        self, command: Command, max_memory: int = DEFAULT_SPOOL_MAX_MEMORY
+    ) -> Tuple[int, BinaryIO, str]:
+        if _replay.get() is None:
+            return super().execute_spooled(command, max_memory=max_memory)
+        # Inside `call` the output is awaited (and replayed) as the other commands, so it's kept in memory
+        return_code, stdout, stderr = self._replay_result(_replay.get(), command, binary=True)
+        return return_code, io.BytesIO(stdout), stderr
+
+    def _replay_result(
+        self, state: dict, command: Command, binary: bool = False, batch: Union[List[Command], None] = None
+    ) -> Tuple[int, Any, str]:
+        position = state["position"]
+        if position == len(state["results"]):
+            raise CommandPending(command, binary=binary, batch=batch)
+        executed_command, result = state["results"][position]
+        if executed_command != command:
+            raise RuntimeError(f"Method is not deterministic: expected {executed_command}, got {command}")
+        state["position"] += 1
+        return result
+
+    def execute_many(self, commands: Iterable[Command]) -> Iterator[Tuple[int, str, str]]:
+        if _replay.get() is None:
+            yield from super().execute_many(commands)
+            return
+        # Inside `call`, the commands are awaited (and replayed) as the other ones, but the ones not executed yet are
+        # awaited before running the method again
+        commands = list(commands)
+        for index, command in enumerate(commands):
+            yield self._replay_result(_replay.get(), command, batch=commands[index:])
+
+    async def call(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a synchronous method which executes commands (like a plugin's `list`), awaiting each command"""
+        state = {"results": [], "position": 0}
+        token = _replay.set(state)
+        try:
+            while True:
+                state["position"] = 0
+                try:
+                    return func(*args, **kwargs)
+                except CommandPending as pending:
+                    for command in pending.batch:
+                        if pending.binary:
+                            result = await self.execute(command, binary=True)
+                        else:
+                            result = await self.execute(command)
+                        state["results"].append((command, result))
+        finally:
+            _replay.reset(token)
+
+    def version(self) -> Tuple[int, int, int]:
+        """Coroutine which executes `dokku version` (synchronous if called from inside a method run by `call`)"""
+        if _replay.get() is not None:
+            return super().version()
+        return self.call(super().version)
@@ -0,0 +1,207 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Tuple, Union
+
+from .models import Command
+
+# Operations which only read state, so their results can be cached (like `apps:list` and `ps:report`). Used for commands
+# not classified by a plugin (`Command.read_only` is `None`).
+READ_ONLY_OPERATIONS = ("list", "report")
+# Writes to these plugins (like creating/renaming apps or installing plugins) may change what any other plugin reports
+INVALIDATE_ALL_PLUGINS = ("apps", "plugin")
+# Options used by the plugins which take a value as the next parameter (like `--format json`)
+OPTIONS_WITH_VALUES = ("--build-dir", "--chown", "--committish", "--fingerprint", "--format", "--name", "--parallel")
+# Options used by the plugins which don't take a value (any other option may take one, so its parameters are ambiguous)
+OPTIONS_WITHOUT_VALUES = (
+    "--add",
+    "--all",
+    "--build",
+    "--build-if-changes",
+    "--clean",
+    "--core",
+    "--encoded",
+    "--force",
+    "--global",
+    "--merged",
+    "--no-restart",
+    "--remove",
+    "--skip-deploy",
+)
+
+
+def dokku_subcommand(command: Command) -> Union[str, None]:
+    """Return the Dokku subcommand of `command` or `None` if it's not a Dokku command
+
+    >>> dokku_subcommand(Command(["dokku", "ps:report", "myapp"]))
+    'ps:report'
+    >>> dokku_subcommand(Command(["cat", "/etc/hosts"])) is None
+    True
+    """
+    cmd = command.command
+    if len(cmd) < 2 or cmd[0] != "dokku":
+        return None
+    return cmd[1]
+
+
+def is_read_only(command: Command) -> bool:
+    """Check whether a Dokku command only reads state (use the plugin's classification, if available)"""
+    if command.read_only is not None:
+        return command.read_only
+    subcommand = dokku_subcommand(command)
+    return subcommand is not None and subcommand.split(":")[-1] in READ_ONLY_OPERATIONS
+
+
+def is_write(command: Command) -> bool:
+    """Check whether a command is a Dokku command which may change state (so cached results must be invalidated)"""
+    return dokku_subcommand(command) is not None and not is_read_only(command)
+
+
+class CommandCache:
+    """Keep results of read-only Dokku commands for some time, evicting the least recently used ones when full
+
+    `ttl` is the default time-to-live (in seconds) and `ttls` may have specific values per subcommand (like
+    `{"ps:report": 2}`). A TTL of `0` disables caching for that subcommand.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 5.0,
+        ttls: Union[Dict[str, float], None] = None,
+        max_size: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_size < 1:
+            raise ValueError("`max_size` must be greater than zero")
+        self.ttl = ttl
+        self.ttls = dict(ttls or {})
+        self.max_size = max_size
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()  # key: (subcommand, params, expires_at, result)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ttl_for(self, subcommand: str) -> float:
+        return self.ttls.get(subcommand, self.ttl)
+
+    def is_cacheable(self, command: Command) -> bool:
+        subcommand = dokku_subcommand(command)
+        if subcommand is None or self.ttl_for(subcommand) <= 0:
+            return False
+        return is_read_only(command)
+
+    def get(self, key: Hashable) -> Union[Tuple[int, str, str], None]:
+        """Return the cached result for `key` (or `None` if there's no valid entry), updating hit/miss counters"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= self.clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[3]
+
+    def set(self, key: Hashable, subcommand: str, result: Tuple[int, str, str], params: Tuple[str] = ()):
+        """Store `result` for `key` (`params` are the subcommand's parameters, used to decide what to invalidate)"""
+        with self._lock:
+            self._entries[key] = (subcommand, tuple(params), self.clock() + self.ttl_for(subcommand), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, command: Command) -> int:
+        """Evict the cached results which a write command may have changed and return how many were evicted
+
+        A write evicts the entries of the same plugin which are for one of the write's parameters (like the app name)
+        or for all the apps (no parameters). A plugin-wide write (`--global`, `--all`, `*-global` operations, no
+        positional parameters or an unknown option before them, so the app name can't be told) evicts all entries of
+        the plugin, and a write to one of `INVALIDATE_ALL_PLUGINS` evicts everything.
+        """
+        subcommand = dokku_subcommand(command)
+        if subcommand is None:
+            return 0
+        plugin, _, operation = subcommand.partition(":")
+        params = command.command[2:]
+        tokens = set(positional_params(params))
+        is_global = (
+            "--global" in params
+            or "--all" in params  # Like `ps:restart --all`
+            or operation.endswith("-global")  # Like `domains:add-global`
+            or not tokens
+            or has_unknown_options(params)
+        )
+
+        def affected(entry_subcommand: str, entry_params: Tuple[str]) -> bool:
+            if entry_subcommand.split(":")[0] != plugin:
+                return False
+            elif is_global:
+                return True
+            elif "--global" in entry_params:
+                return False
+            entry_tokens = set(positional_params(entry_params))
+            return not entry_tokens or bool(entry_tokens & tokens)
+
+        with self._lock:
+            if plugin in INVALIDATE_ALL_PLUGINS:
+                keys = list(self._entries.keys())
+            else:
+                keys = [key for key, entry in self._entries.items() if affected(entry[0], entry[1])]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+def positional_params(params: Union[List[str], Tuple[str]]) -> List[str]:
+    """Return the parameters which are not options nor option values (like app names)
+
+    >>> positional_params(["--format", "json", "app1"])
+    ['app1']
+    >>> positional_params(["--format=json", "--global"])
+    []
+    """
+    result, skip_next = [], False
+    for param in params:
+        if skip_next:
+            skip_next = False
+        elif param.startswith("-"):
+            skip_next = param in OPTIONS_WITH_VALUES
+        else:
+            result.append(param)
+    return result
+
+
+def has_unknown_options(params: Union[List[str], Tuple[str]]) -> bool:
+    """Check whether an option not in `OPTIONS_WITH_VALUES`/`OPTIONS_WITHOUT_VALUES` comes before a positional one
+
+    >>> has_unknown_options(["--no-restart", "app1", "A=1"])
+    False
+    >>> has_unknown_options(["--some-option", "value", "app1"])
+    True
+    >>> has_unknown_options(["--some-option=value", "app1"])
+    False
+    """
+    unknown, skip_next = False, False
+    for param in params:
+        if skip_next:
+            skip_next = False
+        elif param.startswith("-"):
+            skip_next = param in OPTIONS_WITH_VALUES
+            unknown = unknown or not (skip_next or param in OPTIONS_WITHOUT_VALUES or "=" in param)
+        elif unknown:
+            return True
+    return False
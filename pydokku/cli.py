@@ -5,11 +5,18 @@ import sys
 from copy import deepcopy
 from pathlib import Path
 from textwrap import indent
-from typing import Dict, List, Union
+from typing import Any, Callable, Dict, List, Tuple, Union
 
 from . import __version__
+from .executor import DependencyExecutor
+from .filesystem import SnapshotReader, fetch_snapshot
+from .instrumentation import CommandStats
 from .models import Plugin
 from .plugins.base import PluginScheduler
+from .trace import TraceRecorder
+
+# Plugins exported concurrently by default by both the CLI and `dokku_export`
+EXPORT_JOBS = 4
 
 
 def create_dokku_instance(ssh_config: dict = None):
@@ -23,6 +30,10 @@ def create_dokku_instance(ssh_config: dict = None):
         ssh_private_key=ssh_config.get("private_key"),
         ssh_key_password=ssh_config.get("key_password"),
         ssh_mux=ssh_config.get("mux"),
+        ssh_pool_size=ssh_config.get("pool_size") or 1,
+        ssh_mux_prewarm=True,
+        shell_session=bool(ssh_config.get("session")),
+        filesystem=bool(ssh_config.get("filesystem")),
         interactive=True,
     )
 
@@ -39,10 +50,54 @@ def error_log(*args, **kwargs):
     print(*args, **kwargs)
 
 
-def dokku_export(ssh_config: dict, apps_names: Union[List[str], None] = None, quiet: bool = False) -> Dict:
+def ordered_callback(order: List, callback: Callable) -> Callable:
+    """Return an `on_done` function which calls `callback(node, result)` following `order`, as soon as possible"""
+    results, position = {}, [0]
+
+    def on_done(node, result):
+        results[node] = result
+        while position[0] < len(order) and order[position[0]] in results:
+            current = order[position[0]]
+            callback(current, results.pop(current))
+            position[0] += 1
+
+    return on_done
+
+
+def log_critical_path(errlog: Callable, executor: DependencyExecutor):
+    path = executor.critical_path()
+    if not path:
+        return
+    total = sum(executor.timings[node].duration for node in path)
+    steps = " -> ".join(f"{node} ({executor.timings[node].duration:.2f}s)" for node in path)
+    errlog(f"Critical path ({total:.2f}s): {steps}")
+
+
+def dokku_export(
+    ssh_config: dict,
+    apps_names: Union[List[str], None] = None,
+    quiet: bool = False,
+    jobs: int = EXPORT_JOBS,
+    command_stats: bool = False,
+    trace: Union[Path, None] = None,
+    snapshot: bool = False,
+) -> Dict:
     errlog = no_log if quiet else error_log
     system = apps_names is None
     dokku = create_dokku_instance(ssh_config=ssh_config)
+    stats, tracer = CommandStats(), TraceRecorder()
+    dokku.on_command_end.append(stats)
+    if trace is not None:
+        dokku.on_command_end.append(tracer.command_hook)
+    if snapshot:
+        errlog("Fetching snapshot...", end="")
+        try:
+            with tracer.span("snapshot", "export"):
+                dokku.filesystem = fetch_snapshot(dokku)
+        except RuntimeError as exc:
+            errlog(f" failed, executing commands instead ({exc})")
+        else:
+            errlog(" done.")
     data = {
         "pydokku": {"version": ".".join(str(part) for part in __version__)},
         "dokku": {"version": ".".join(str(part) for part in dokku.version())},
@@ -60,6 +115,8 @@ def dokku_export(ssh_config: dict, apps_names: Union[List[str], None] = None, qu
         )
     implemented_plugins = dokku.plugins.values()
     errlog(f", {len(implemented_plugins)} implemented.")
+    for name, error in dokku.plugins.errors.items():
+        errlog(f"WARNING: cannot load plugin {repr(name)}, skipping it: {error}")
     errlog("Finding apps...", end="")
     apps = dokku.apps.list()
     errlog(f" {len(apps)} found", end="")
@@ -76,34 +133,67 @@ def dokku_export(ssh_config: dict, apps_names: Union[List[str], None] = None, qu
     exported_plugins = set()
     scheduler = PluginScheduler(plugins=implemented_plugins)
     plugin_batches = list(scheduler)
+    stages = {name: index for index, plugin_batch in enumerate(plugin_batches) for name in plugin_batch}
     required_cmd_warnings = []
-    for plugin_batch in plugin_batches:
-        # TODO: make the batch parallel?
-        for name in plugin_batch:
-            plugin = dokku.plugins[name]
-            errlog(f"Listing and serializing objects for plugin {name}...", end="")
-            plugin_name = plugin.plugin_name
-            if plugin_name not in system_plugins:
-                errlog(" not installed, skipping.")
-                continue
-            elif not system_plugins[plugin_name].enabled:
-                errlog(" not enabled, skipping.")
-                continue
-            data[name] = []
-            try:
-                for obj in plugin.object_list(apps, system=system):
-                    data[name].append({key: value for key, value in obj.serialize().items() if value is not None})
-            except NotImplementedError:
-                del data[name]
-                errlog(f"WARNING: cannot export data for plugin {repr(name)} (`object_list` method not implemened)")
-            else:
-                exported_plugins.add(plugin_name)
-                if name == "plugin" and not system:
-                    errlog(f" {len(data[name])} serialized (not all of them may be exported).")
-                else:
-                    errlog(f" {len(data[name])} exported.")
-                if not dokku.can_execute_regular_commands and len(data[name]) > 0 and plugin.requires_extra_commands:
-                    required_cmd_warnings.append(name)
+
+    def export_plugin(name: str):
+        """Export one plugin's objects, buffering the log messages so they're shown in a deterministic order"""
+        messages = []
+
+        def log(*args, end="\n"):
+            messages.append(" ".join(str(arg) for arg in args) + end)
+
+        plugin = dokku.plugins[name]
+        log(f"Listing and serializing objects for plugin {name}...", end="")
+        plugin_name = plugin.plugin_name
+        if plugin_name not in system_plugins:
+            log(" not installed, skipping.")
+            return None, messages
+        elif not system_plugins[plugin_name].enabled:
+            log(" not enabled, skipping.")
+            return None, messages
+        try:
+            with tracer.span(f"{name}.object_list", "plugin", plugin=name, stage=stages[name]):
+                values = [
+                    {key: value for key, value in obj.serialize().items() if value is not None}
+                    for obj in plugin.object_list(apps, system=system)
+                ]
+        except NotImplementedError:
+            log(f"WARNING: cannot export data for plugin {repr(name)} (`object_list` method not implemened)")
+            return None, messages
+        if name == "plugin" and not system:
+            log(f" {len(values)} serialized (not all of them may be exported).")
+        else:
+            log(f" {len(values)} exported.")
+        return values, messages
+
+    def collect_plugin(name: str, result):
+        values, messages = result
+        errlog("".join(messages), end="")
+        if values is None:
+            return
+        plugin = dokku.plugins[name]
+        data[name] = values
+        exported_plugins.add(plugin.plugin_name)
+        if not dokku.can_execute_regular_commands and len(values) > 0 and plugin.requires_extra_commands:
+            required_cmd_warnings.append(name)
+
+    # Each plugin starts as soon as the plugins it requires are exported (most of the time is spent waiting for the
+    # commands to finish, so many of them can run concurrently). Results are collected in the scheduler order.
+    executor = DependencyExecutor(
+        dependencies={plugin.name: plugin.requires for plugin in implemented_plugins}, max_workers=jobs
+    )
+    plugins_order = [name for plugin_batch in plugin_batches for name in plugin_batch]
+    try:
+        executor.run(export_plugin, on_done=ordered_callback(plugins_order, collect_plugin))
+    finally:  # The trace is also useful when something fails
+        if trace is not None:
+            tracer.save(trace)
+        if isinstance(dokku.filesystem, SnapshotReader):
+            dokku.filesystem.close()
+    log_critical_path(errlog, executor)
+    if command_stats:
+        errlog(stats.summary())
     not_exported = set(system_plugins.keys()) - exported_plugins
     if not_exported:
         plural = "s" if len(system_plugins) != 1 else ""
@@ -131,12 +221,74 @@ def dokku_export(ssh_config: dict, apps_names: Union[List[str], None] = None, qu
     return data
 
 
-def dokku_apply(data: Dict, ssh_config: dict, force: bool = False, quiet: bool = False, execute: bool = True):
+def apply_task_graph(plugins: Dict[str, Any], plugins_objects: Dict[str, List]) -> Tuple[Dict, Dict]:
+    """Create the dependency graph used by `dokku_apply`, with one task per `(plugin name, app name)`
+
+    Each plugin has a system task (`app_name` is `None`), which acts as a barrier for the plugin's app tasks. An app
+    task depends on the system task for the same plugin and on the tasks for the same app in the plugins it requires
+    (or in their requirements, if the app has no objects in a required plugin). Returns `(dependencies, tasks)`, where
+    `tasks` maps each node to `(objects, skip_system)`.
+    """
+    tasks = {}
+    for name, plugin in plugins.items():
+        system_objs, apps_objs = plugin.object_split_by_app(plugins_objects[name])
+        tasks[(name, None)] = (system_objs, False)
+        for app_name, objs in apps_objs.items():
+            tasks[(name, app_name)] = (objs, True)
+
+    app_requirements_cache = {}
+
+    def app_requirements(name: str, app_name: Union[str, None]) -> set:
+        """Nearest tasks for `app_name` in the plugins `name` requires (directly or indirectly)"""
+        key = (name, app_name)
+        if key not in app_requirements_cache:
+            result = set()
+            for dependency in plugins[name].requires:
+                if dependency not in plugins:  # Already done (like `plugin`)
+                    continue
+                elif (dependency, app_name) in tasks:
+                    result.add((dependency, app_name))
+                else:
+                    result.update(app_requirements(dependency, app_name))
+            app_requirements_cache[key] = result
+        return app_requirements_cache[key]
+
+    dependencies = {}
+    for name, plugin in plugins.items():
+        system_node = (name, None)
+        system_objs, _ = tasks[system_node]
+        requires = {(dependency, None) for dependency in plugin.requires if dependency in plugins}
+        for app_name in dict.fromkeys(plugin.object_app_name(obj) for obj in system_objs):
+            if app_name is not None:
+                requires.update(app_requirements(name, app_name))
+        dependencies[system_node] = sorted(requires, key=str)
+    for (name, app_name), _ in tasks.items():
+        if app_name is not None:
+            requires = {(name, None)} | app_requirements(name, app_name)
+            dependencies[(name, app_name)] = sorted(requires, key=str)
+    return dependencies, tasks
+
+
+def dokku_apply(
+    data: Dict,
+    ssh_config: dict,
+    force: bool = False,
+    quiet: bool = False,
+    execute: bool = True,
+    jobs: int = 1,
+    batch: bool = False,
+    command_stats: bool = False,
+    trace: Union[Path, None] = None,
+):
     errlog = no_log if quiet else error_log
     data = deepcopy(data)
     data.pop("pydokku")
     dokku_metadata = data.pop("dokku")
     dokku = create_dokku_instance(ssh_config=ssh_config)
+    stats, tracer = CommandStats(), TraceRecorder()
+    dokku.on_command_end.append(stats)
+    if trace is not None:
+        dokku.on_command_end.append(tracer.command_hook)
     expected_version = [int(part) for part in dokku_metadata["version"].split(".")]
     current_version = list(dokku.version())
     if current_version != expected_version:
@@ -150,44 +302,111 @@ def dokku_apply(data: Dict, ssh_config: dict, force: bool = False, quiet: bool =
 
     system_plugins = {plugin.name: plugin for plugin in dokku.plugin.list()}
 
-    def process_plugin(name: str):
+    def load_objects(name: str):
+        """Deserialize one plugin's objects (`None` is returned if the plugin must be skipped)"""
         plugin = dokku.plugins[name]
         plugin_name = plugin.plugin_name
         prefix = ("# " if not execute else "") + f"[{name}] "
         values = data.pop(name, None)
         if values is None:
             errlog(f"{prefix}No data found, skipping.")
-            return
+            return None
         elif plugin_name not in system_plugins:
             errlog(f"{prefix}Not found, skipping.")
-            return
+            return None
         elif not system_plugins[plugin_name].enabled:
             errlog(f"{prefix}Disabled, skipping.")
-            return
+            return None
         errlog(f"{prefix}Reading objects...", end="")
         objects = [plugin.object_deserialize(row) for row in values]
         errlog(f" {len(objects)} loaded.")
-        errlog(f"{prefix}Creating objects")
-        for result in plugin.object_create_many(objects, execute=execute):
-            # `result` will be command's stdout (if execute) or Command object (if not execute)
-            output = str(result).strip()
-            if execute:
-                output = indent(output, "    ")
-            print(output)
-            # TODO: add option to return output instead of printing
+        return objects
+
+    def create_objects(name: str, app_name: Union[str, None], objects: List, skip_system: bool):
+        """Create objects of one plugin, buffering the messages so they're shown in a deterministic order"""
+        messages = []  # `(is_output, text)` pairs
+        if not objects:
+            return messages
+        prefix = ("# " if not execute else "") + f"[{name}] "
+        title = "Creating objects" if app_name is None else f"Creating objects for app {app_name}"
+        messages.append((False, f"{prefix}{title}\n"))
+        plugin = dokku.plugins[name]
+        span_name = f"{name}.object_create_many" + (f" ({app_name})" if app_name is not None else "")
+        with tracer.span(span_name, "plugin", plugin=name, app=app_name, stage=stages[name]):
+            for result in plugin.object_create_many(objects, execute=execute, skip_system=skip_system):
+                # `result` will be command's stdout (if execute) or Command object (if not execute)
+                output = str(result).strip()
+                if execute:
+                    output = indent(output, "    ")
+                messages.append((True, output))
+                # TODO: add option to return output instead of printing
+        return messages
+
+    def show_messages(node, messages: List):
+        for is_output, text in messages:
+            if is_output:
+                print(text)
+            else:
+                errlog(text, end="")
+
+    def create_stage_objects(stage: int, nodes: List):
+        """Create the objects of all the `(plugin, app)` tasks in a stage sending their commands in one script"""
+        commands = {}
+        for node in nodes:
+            objects, skip_system = tasks[node]
+            plugin = dokku.plugins[node[0]]
+            commands[node] = list(plugin.object_create_many(objects, execute=False, skip_system=skip_system))
+        results = dokku.execute_many([command for node in nodes for command in commands[node]])
+        with tracer.span(f"stage {stage}", "stage", stage=stage):
+            try:
+                for (name, app_name), node_commands in commands.items():
+                    plugin = dokku.plugins[name]
+                    title = "Creating objects" if app_name is None else f"Creating objects for app {app_name}"
+                    messages = [(False, f"[{name}] {title}\n")]
+                    for command in node_commands:
+                        result = next(results)
+                        plugin.check_result(command, *result)  # Like the checks done when the plugin executes it
+                        messages.append((True, indent(result[1].strip(), "    ")))
+                    show_messages((name, app_name), messages)
+            finally:
+                results.close()
 
     scheduler = PluginScheduler(plugins=dokku.plugins.values())
     # Consume the entire scheduler so if there are any loops in the plugin dependency graph the exception will be
     # raised before doing anything.
     plugin_batches = list(scheduler)
-    process_plugin("plugin")  # Must install all plugins before anything
+    stages = {name: index for index, plugin_batch in enumerate(plugin_batches) for name in plugin_batch}
+    # Must install all plugins before anything
+    show_messages("plugin", create_objects("plugin", None, load_objects("plugin") or [], skip_system=False))
     system_plugins = {plugin.name: plugin for plugin in dokku.plugin.list()}  # Update after installing new ones
-    for plugin_batch in plugin_batches:
-        # TODO: make the batch parallel?
-        for name in plugin_batch:
-            if name == "plugin":
-                continue  # Done already
-            process_plugin(name)
+    plugins_order = [name for plugin_batch in plugin_batches for name in plugin_batch if name != "plugin"]
+    plugins_objects = {name: load_objects(name) or [] for name in plugins_order}
+    dependencies, tasks = apply_task_graph(
+        plugins={name: dokku.plugins[name] for name in plugins_order}, plugins_objects=plugins_objects
+    )
+    # Each `(plugin, app)` task starts as soon as the same app is done in the required plugins (and the system objects
+    # for this plugin are created), so independent apps proceed in parallel through their own plugin chain.
+    executor = DependencyExecutor(dependencies=dependencies, max_workers=jobs)
+    try:
+        if batch and execute:
+            # Plugins in the same stage don't depend on each other, so all the commands of a stage (for all its plugins
+            # and apps) are sent in one script (one round trip per stage), stopping at the first error
+            for stage, plugin_batch in enumerate(plugin_batches):
+                nodes = [node for node in executor.order if node[0] in plugin_batch and tasks[node][0]]
+                if nodes:
+                    create_stage_objects(stage, nodes)
+        else:
+            executor.run(
+                lambda node: create_objects(node[0], node[1], *tasks[node]),
+                on_done=ordered_callback(executor.order, show_messages),
+            )
+    finally:  # The trace is also useful when something fails
+        if trace is not None:
+            tracer.save(trace)
+    if not batch or not execute:
+        log_critical_path(errlog, executor)
+    if command_stats:
+        errlog(stats.summary())
     if data:
         not_executed = list(data.keys())
         errlog(f"WARNING: remaining plugins not executed: {', '.join(not_executed)}")
@@ -211,6 +430,18 @@ def main():
     parser.add_argument("--ssh-private-key", "-k", type=Path)
     parser.add_argument("--ssh-key-password", "-P", type=str, help="Prefer to use SSH_KEY_PASSWORD env var")
     parser.add_argument("--no-ssh-mux", "-N", action="store_true", help="Disable SSH multiplexing")
+    parser.add_argument(
+        "--ssh-pool-size",
+        type=int,
+        default=1,
+        help="Number of SSH multiplexed connections used by concurrent commands (default: 1)",
+    )
+    parser.add_argument(
+        "--shell-session",
+        "-S",
+        action="store_true",
+        help="Run all commands through one long-lived shell (not available for SSH user `dokku`)",
+    )
 
     subparsers = parser.add_subparsers(dest="command", required=True)
 
@@ -220,6 +451,30 @@ def main():
     export_parser.add_argument("--app", "-a", type=str, action="append", help="Filter which app(s) to export")
     export_parser.add_argument("--indent", "-i", type=int, default=2, help="Indentation level (in spaces)")
     export_parser.add_argument("--quiet", "-q", action="store_true", help="Do not show warnings on stderr")
+    export_parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=EXPORT_JOBS,
+        help=f"Number of plugins to export concurrently (default: {EXPORT_JOBS})",
+    )
+    export_parser.add_argument(
+        "--command-stats", "-s", action="store_true", help="Show the time spent by each subcommand on stderr"
+    )
+    export_parser.add_argument(
+        "--trace", "-t", type=Path, help="Save a Chrome trace-event file (open in ui.perfetto.dev) to this filename"
+    )
+    export_parser.add_argument(
+        "--filesystem",
+        "-F",
+        action="store_true",
+        help="Read apps, configs, domains, redirects and storage from Dokku's files (local `root`/`dokku` user only)",
+    )
+    export_parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help="Download Dokku's files in one compressed stream and read them locally (SSH user must not be `dokku`)",
+    )
     export_parser.add_argument("json_filename", type=Path, help="JSON filename to save data")
 
     graph_parser = subparsers.add_parser(
@@ -233,12 +488,27 @@ def main():
     )
     apply_parser.add_argument("--force", "-f", action="store_true", help="Force execution even if version mismatches")
     apply_parser.add_argument("--quiet", "-q", action="store_true", help="Do not show warnings on stderr")
+    apply_parser.add_argument(
+        "--jobs", "-j", type=int, default=1, help="Number of (plugin, app) tasks to apply concurrently (default: 1)"
+    )
+    apply_parser.add_argument(
+        "--batch",
+        "-b",
+        action="store_true",
+        help="Send all the commands of each plugins stage (for all the apps) in a single remote script",
+    )
     apply_parser.add_argument(
         "--print-only",
         "-p",
         action="store_true",
         help="Print the commands to be executed instead of actually executing them",
     )
+    apply_parser.add_argument(
+        "--command-stats", "-s", action="store_true", help="Show the time spent by each subcommand on stderr"
+    )
+    apply_parser.add_argument(
+        "--trace", "-t", type=Path, help="Save a Chrome trace-event file (open in ui.perfetto.dev) to this filename"
+    )
     apply_parser.add_argument("json_filename", type=Path, help="Filename created by `pydokku export` command")
 
     args = parser.parse_args()
@@ -249,6 +519,9 @@ def main():
         "private_key": args.ssh_private_key,
         "key_password": args.ssh_key_password or os.environ.get("SSH_KEY_PASSWORD"),
         "mux": not args.no_ssh_mux,
+        "pool_size": args.ssh_pool_size,
+        "session": args.shell_session,
+        "filesystem": getattr(args, "filesystem", False),
     }
 
     if args.command == "version":
@@ -259,6 +532,10 @@ def main():
             ssh_config=ssh_config,
             apps_names=args.app or None,
             quiet=args.quiet,
+            jobs=args.jobs,
+            command_stats=args.command_stats,
+            trace=args.trace,
+            snapshot=args.snapshot,
         )
         json_data = json.dumps(data, indent=args.indent, default=str)
         json_filename = args.json_filename
@@ -281,6 +558,10 @@ def main():
             quiet=args.quiet,
             execute=not args.print_only,
             ssh_config=ssh_config,
+            jobs=args.jobs,
+            batch=args.batch,
+            command_stats=args.command_stats,
+            trace=args.trace,
         )
 
     elif args.command == "dependency-graph":
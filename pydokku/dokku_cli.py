@@ -1,13 +1,26 @@
 import getpass
 import hashlib
-import tempfile
+from contextlib import contextmanager
 from functools import cached_property
 from pathlib import Path, PosixPath
-from typing import Dict, Tuple, Union
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Tuple, Union
 
 from . import ssh
+from .cache import CommandCache, dokku_subcommand, is_write
+from .filesystem import FilesystemReader
+from .instrumentation import CommandEvent
 from .models import Command
-from .utils import execute_command
+from .plugins import PluginRegistry
+from .shell import ShellSession, directory_files_script, execute_script, read_frames
+from .utils import (
+    DEFAULT_SPOOL_MAX_MEMORY,
+    StreamingProcess,
+    check_result,
+    clean_stderr,
+    execute_command,
+    is_text_stdin,
+    spool_output,
+)
 
 # TODO: add docstrings to all the functions
 
@@ -25,7 +38,12 @@ class Dokku:
         ssh_key_password: Union[str, None] = None,
         ssh_mux: bool = True,
         ssh_mux_timeout: int = 600,
+        ssh_pool_size: int = 1,
+        ssh_mux_prewarm: bool = False,
         interactive: bool = False,
+        shell_session: bool = False,
+        cache: Union[CommandCache, bool, None] = None,
+        filesystem: bool = False,
     ):
         self._dokku_version = None  # Variable meant to cache Dokku version on the first run of `version()`
         self.lib_root = lib_root
@@ -34,11 +52,19 @@ class Dokku:
         self.local_user = getpass.getuser()
         self.ssh_host, self.ssh_port, self.ssh_user = None, None, None
         self.interactive = interactive
+        self._session = None
+        self._ssh_pool = None
+        # Results of read-only commands (`:report`/`:list`) are reused while they're valid if a cache is set
+        self.cache = CommandCache() if cache is True else (cache if cache is not False else None)
+        # Callables which receive a `CommandEvent` before/after each command is executed (cache hits are not included)
+        self.on_command_start: List[Callable[[CommandEvent], None]] = []
+        self.on_command_end: List[Callable[[CommandEvent], None]] = []
         if ssh_host:
             self.ssh_host, self.ssh_port, self.ssh_user = ssh_host, ssh_port, ssh_user
             self.ssh_private_key = (
                 Path(ssh_private_key).expanduser().absolute() if ssh_private_key is not None else None
             )
+            original_private_key = self.ssh_private_key  # An unlocked key is a different temporary file each time
             if ssh_private_key is None:
                 if not interactive:
                     raise ValueError("`ssh_private_key` must be provided to ensure the execution is non-interactive")
@@ -51,11 +77,27 @@ class Dokku:
                     self.__files_to_delete.append(self.ssh_private_key)
             mux_filename = None
             if ssh_mux:
-                # TODO: create temp file hash (ssh host, ssh port, ssh user, ssh key path) and add to _files_to_delete
-                hash_key = [self.ssh_host, str(self.ssh_port), self.ssh_user, str(self.ssh_private_key)]
-                mux_hash = hashlib.sha1("|".join(hash_key).encode("utf-8")).hexdigest()
-                mux_filename = Path(tempfile.NamedTemporaryFile(delete=False, prefix=f"pydokku-ssh-{mux_hash}-").name)
-                self.__files_to_delete.append(mux_filename)
+                # Sockets have stable names (based on host, port, user and key) in a private per-user directory, so
+                # masters started by other processes are reused
+                mux_filenames = [
+                    ssh.mux_filename(
+                        user=self.ssh_user,
+                        host=self.ssh_host,
+                        port=self.ssh_port,
+                        private_key=original_private_key,
+                        index=index,
+                    )
+                    for index in range(max(1, ssh_pool_size))
+                ]
+                self._ssh_pool = ssh.SSHPool(
+                    user=self.ssh_user,
+                    host=self.ssh_host,
+                    port=self.ssh_port,
+                    private_key=self.ssh_private_key,
+                    mux_filenames=mux_filenames,
+                    mux_timeout=ssh_mux_timeout,
+                )
+                mux_filename = self._ssh_pool.mux_filenames[0]
             self._ssh_prefix = ssh.command(
                 user=self.ssh_user,
                 host=self.ssh_host,
@@ -65,55 +107,41 @@ class Dokku:
                 mux_filename=mux_filename,
                 mux_timeout=ssh_mux_timeout,
             ) + ["--"]
+        # Some read-only operations (like `apps.list` and `config.get`) are served from Dokku's files, if accessible
+        self.filesystem = None
+        if filesystem and not self.via_ssh and self.local_user in ("dokku", "root"):
+            reader = FilesystemReader(lib_path=lib_root)
+            if reader.available():
+                self.filesystem = reader
+        if shell_session:
+            # A long-lived shell can't be used when the only thing the remote user can do is to run `dokku` commands
+            if not self.can_execute_regular_commands:
+                raise ValueError("`shell_session` cannot be used when connecting via SSH with user `dokku`")
+            self._session = ShellSession(prefix=self._ssh_prefix)
+        if self._ssh_pool is not None and ssh_mux_prewarm:  # Only after all arguments are validated
+            # Any command would start the masters - a Dokku one is used if it's the only kind the user can run
+            noop = ["true"] if self.can_execute_regular_commands else ["version"]
+            self._ssh_pool.prewarm(noop=noop)
 
-        # Instantiate default plugins
-        # TODO: autodiscover based on `DokkuPlugin` subclasses?
-        from .plugins import (  # noqa
-            AppsPlugin,
-            ChecksPlugin,
-            ConfigPlugin,
-            DomainsPlugin,
-            GitPlugin,
-            LetsEncryptPlugin,
-            MaintenancePlugin,
-            NetworkPlugin,
-            NginxPlugin,
-            PluginPlugin,
-            PortsPlugin,
-            ProxyPlugin,
-            PsPlugin,
-            RedirectPlugin,
-            SSHKeysPlugin,
-            StoragePlugin,
-        )
+        # Plugins are imported and instantiated on first access (like `dokku.apps`), so creating this object is cheap
+        # TODO: may skip a plugin if Dokku does not have it installed (would require running `dokku.plugin.list`)
+        self.plugins = PluginRegistry(factory=self._create_plugin)
 
-        implemented_plugins = (
-            AppsPlugin,
-            ChecksPlugin,
-            ConfigPlugin,
-            DomainsPlugin,
-            GitPlugin,
-            LetsEncryptPlugin,
-            MaintenancePlugin,
-            NetworkPlugin,
-            NginxPlugin,
-            PluginPlugin,
-            PortsPlugin,
-            ProxyPlugin,
-            PsPlugin,
-            RedirectPlugin,
-            SSHKeysPlugin,
-            StoragePlugin,
-        )
-        self.plugins = {}
-        for klass in implemented_plugins:
-            name = klass.name
-            # TODO: may skip adding plugin as an attribute if Dokku does not have it installed. This would require
-            # running `dokku.plugin.list` here in `__init__`, which would make it very difficult to instantiate this
-            # class on tests in a machine without Dokku installed, so maybe we can delay this action.
-            instance = klass(dokku=self)
-            setattr(self, name, instance)
-            self.plugins[name] = instance
+    def _create_plugin(self, klass):
+        return klass(dokku=self)
+
+    def __getattr__(self, name: str):
+        # Only called if `name` is not found, so it won't slow down regular attributes (nor plugins already loaded).
+        # Private names are never plugins, so they won't trigger the third-party plugins lookup.
+        plugins = self.__dict__.get("plugins")
+        if plugins is None or name.startswith("_") or name not in plugins:
+            raise AttributeError(f"{self.__class__.__name__!r} object has no attribute {name!r}")
+        instance = plugins[name]
+        setattr(self, name, instance)
+        return instance
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | set(self.__dict__.get("plugins") or ()))
 
     @cached_property
     def via_ssh(self):
@@ -135,14 +163,42 @@ class Dokku:
         # sudoer we can actually execute non-Dokku commands.
         return not self.via_ssh or self.ssh_user != "dokku"
 
+    def close(self):
+        """Terminate the long-lived shell session and the SSH mux masters (`ssh -O exit`), if they're running
+
+        The masters are not stopped when the object is garbage-collected, so they can be reused by other processes
+        until `ssh_mux_timeout` is reached.
+        """
+        self._close_session()
+        if getattr(self, "_ssh_pool", None) is not None:
+            self._ssh_pool.close()
+
+    def _close_session(self):
+        if getattr(self, "_session", None) is not None:
+            self._session.close()
+
     def __del__(self):
+        self._close_session()
         if hasattr(self, "_Dokku__files_to_delete"):
             for filename in self.__files_to_delete:
                 if filename.exists():
                     filename.unlink()
 
-    def _prepare_command(self, command: Command) -> Tuple[str]:
-        """Prepare the final command to be executed, considering sudo, local/remote user and the command itself"""
+    @contextmanager
+    def _ssh_channel(self) -> Iterator[List[str]]:
+        """SSH prefix to execute one command (using the least busy mux master, if there's a pool)"""
+        if self._ssh_pool is None:
+            yield self._ssh_prefix
+        else:
+            with self._ssh_pool.channel() as ssh_command:
+                yield ssh_command + ["--"]
+
+    def _prepare_command(self, command: Command, include_ssh: bool = True) -> Tuple[str]:
+        """Prepare the final command to be executed, considering sudo, local/remote user and the command itself
+
+        If `include_ssh` is `False`, the SSH prefix is not added (useful when the command will be sent to a shell
+        already running on the remote host).
+        """
         cmd = list(command.command)
         use_sudo = command.sudo
         is_dokku_command = cmd[0] == "dokku"
@@ -162,12 +218,133 @@ class Dokku:
         else:  # May consider: self.local_user, use_sudo, is_dokku_command. Don't care: self.ssh_user
             if self.local_user == "root":
                 use_sudo = False  # If executing locally and the local user is `root`, `sudo` is not needed
-        return self._ssh_prefix + (["sudo"] if use_sudo else []) + cmd
+        return (self._ssh_prefix if include_ssh else []) + (["sudo"] if use_sudo else []) + cmd
 
     def _execute(self, command: Command) -> Tuple[int, str, str]:
-        cmd = self._prepare_command(command)
-        # TODO: may add a debugging log call here with the full command to be executed
-        return execute_command(command=cmd, stdin=command.stdin, check=command.check)
+        if self.cache is None:
+            return self._execute_uncached(command)
+        elif not self.cache.is_cacheable(command):
+            try:
+                return self._execute_uncached(command)
+            finally:  # Even failed commands may have changed something
+                self._invalidate_cache(command)
+        key = self._cache_key(command)
+        result = self.cache.get(key)
+        if result is None:
+            result = self._execute_uncached(command)
+            if result[0] == 0:
+                self.cache.set(key, dokku_subcommand(command), result, params=command.command[2:])
+        return result
+
+    def _cache_key(self, command: Command) -> tuple:
+        return (tuple(self._prepare_command(command)), command.stdin)
+
+    def _invalidate_cache(self, command: Command):
+        if self.cache is not None and is_write(command):
+            self.cache.invalidate(command)
+
+    def _command_started(self, command: Command, argv: List[str]) -> CommandEvent:
+        event = CommandEvent(command=command, argv=list(argv))
+        for hook in self.on_command_start:
+            hook(event)
+        return event
+
+    def _command_finished(
+        self, event: CommandEvent, result: Tuple[int, str, str], stdout_bytes: Union[int, None] = None
+    ):
+        event.finish(*result)
+        if stdout_bytes is not None:  # stdout was streamed, so it's not available in `result`
+            event.stdout_bytes = stdout_bytes
+        for hook in self.on_command_end:
+            hook(event)
+
+    def _execute_uncached(self, command: Command) -> Tuple[int, str, str]:
+        if self._session is not None and is_text_stdin(command.stdin):  # Binary stdin can't go through the session
+            cmd = self._prepare_command(command, include_ssh=False)
+            event = self._command_started(command, self._ssh_prefix + cmd)
+            result = self._session.execute(command=cmd, stdin=command.stdin, check=False)
+        else:
+            with self._ssh_channel() as ssh_prefix:
+                cmd = ssh_prefix + self._prepare_command(command, include_ssh=False)
+                event = self._command_started(command, cmd)
+                result = execute_command(command=cmd, stdin=command.stdin, check=False)
+        self._command_finished(event, result)
+        if command.check:
+            check_result(cmd, *result)
+        return result
+
+    def execute_stream(self, command: Command) -> StreamingProcess:
+        """Execute a command (always in a new process) and return a `StreamingProcess` to read its output as it arrives
+
+        Useful for long-running commands (like following logs) and for huge outputs, which don't need to be buffered
+        in memory. Results are never cached.
+        """
+        channel = self._ssh_channel()  # Kept until the process finishes
+        cmd = channel.__enter__() + self._prepare_command(command, include_ssh=False)
+        event = self._command_started(command, cmd)
+
+        def on_exit(process: StreamingProcess):
+            channel.__exit__(None, None, None)
+            self._command_finished(event, (process.return_code, "", process.stderr), stdout_bytes=process.stdout_bytes)
+            self._invalidate_cache(command)
+
+        try:
+            return StreamingProcess(command=cmd, stdin=command.stdin, check=command.check, on_exit=on_exit)
+        except BaseException:
+            channel.__exit__(None, None, None)
+            raise
+
+    def execute_spooled(
+        self, command: Command, max_memory: int = DEFAULT_SPOOL_MAX_MEMORY
+    ) -> Tuple[int, BinaryIO, str]:
+        """Execute a command with a huge output, returning `(return_code, stdout_file, stderr)`
+
+        Only `max_memory` bytes of stdout are kept in memory (the rest is spilled to a temporary file). The caller must
+        close `stdout_file`.
+        """
+        return spool_output(self.execute_stream(command), max_memory=max_memory)
+
+    def execute_many(self, commands: Iterable[Command]) -> Iterator[Tuple[int, str, str]]:
+        """Execute many commands in one round trip, yielding `(return_code, stdout, stderr)` for each of them
+
+        All the commands are compiled into one shell script, executed by a single process (or SSH connection), and the
+        results are read back as each command finishes. A `RuntimeError` is raised for the first failing command with
+        `check=True` (the next commands are not executed). If this instance can't execute regular commands (SSH with
+        user `dokku`) or any command has a binary stdin, the commands are executed one by one.
+        """
+        commands = list(commands)
+        if not commands:
+            return
+        elif not self.can_execute_regular_commands or not all(is_text_stdin(command.stdin) for command in commands):
+            # Binary stdin is streamed to each command's process, so it's not embedded in the script
+            for command in commands:
+                yield self._execute(command)
+            return
+        prepared = [self._prepare_command(command, include_ssh=False) for command in commands]
+        with self._ssh_channel() as ssh_prefix:
+            results = execute_script(
+                prefix=ssh_prefix,
+                commands=[(cmd, command.stdin, command.check) for cmd, command in zip(prepared, commands)],
+            )
+            executed = 0
+            # The script doesn't report when each command starts, so each one is considered started when the previous
+            # result arrives
+            event = self._command_started(commands[0], ssh_prefix + prepared[0])
+            try:
+                for cmd, command, result in zip(prepared, commands, results):
+                    executed += 1
+                    self._command_finished(event, result)
+                    if executed < len(commands):
+                        event = self._command_started(commands[executed], ssh_prefix + prepared[executed])
+                    if command.check:
+                        check_result(cmd, *result)
+                    yield result
+            finally:
+                results.close()
+                for command in commands[:executed]:
+                    self._invalidate_cache(command)
+        if executed < len(commands):
+            raise RuntimeError(f"Batch script terminated after {executed} of {len(commands)} commands")
 
     def version(self) -> Tuple[int, int, int]:
         """Execute `dokku version` and caches the value for this instance"""
@@ -183,6 +360,10 @@ class Dokku:
         This method is useful to get information regarding a plugin that it won't show in :list/:report commands, such
         as values configured using `letsencrypt:set`.
         """
+        if self.filesystem is not None:
+            data = self.filesystem.plugin_app_config(plugin_name, app_name)
+            if data is not None:
+                return data
         plugin_config_path = self.lib_root / "config" / plugin_name
         plugin_app_config_path = plugin_config_path / app_name
         _, stdout, stderr = self._execute(
@@ -200,3 +381,33 @@ class Dokku:
             )
             data[filename] = stdout
         return data
+
+    def plugin_apps_config(self, plugin_name: str, apps_names: List[str]) -> Dict[str, Dict]:
+        """Same as `plugin_app_config` for many apps (`--global` for the global config), using only one command
+
+        Return a `dict` with `{app_name: {filename: content}}`. The files of all apps are read by a single shell script
+        (executed with `sudo`, if needed) and sent back as framed output.
+        """
+        result = {app_name: {} for app_name in apps_names}
+        if not apps_names:
+            return result
+        if self.filesystem is not None:
+            data = {app_name: self.filesystem.plugin_app_config(plugin_name, app_name) for app_name in apps_names}
+            if None not in data.values():
+                return data
+        # Frames are read by their sizes, so the token doesn't need to be random. Being the same for the same arguments
+        # keeps the command deterministic (required by `AsyncDokku`, which replays the commands already executed).
+        token = hashlib.sha256("\n".join([plugin_name] + list(apps_names)).encode("utf-8")).hexdigest()[:16]
+        script = directory_files_script(token, str(self.lib_root / "config" / plugin_name), apps_names)
+        # The output is read as bytes, since frame sizes are in bytes (text mode would convert `\r\n`)
+        return_code, stdout, stderr = self.execute_spooled(
+            Command(["sh", "-c", script], check=False, sudo=self.requires_sudo)
+        )
+        with stdout:
+            if return_code != 0 or clean_stderr(stderr):
+                raise RuntimeError(f"Cannot get plugin config for apps (exit code {return_code}): {stderr}")
+            for name, _, content, _ in read_frames(stdout, token, errors="replace"):
+                app_name, _, filename = name.partition("/")
+                if app_name in result:
+                    result[app_name][filename] = content
+        return result
@@ -0,0 +1,123 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Union
+
+
+@dataclass
+class NodeTiming:
+    """Execution time of one node (`started_at` and `finished_at` are seconds since the executor started)"""
+
+    started_at: float
+    finished_at: float
+
+    @property
+    def duration(self) -> float:
+        return self.finished_at - self.started_at
+
+
+class DependencyExecutor:
+    """Run one task per node on a pool of threads, starting each node as soon as all its dependencies are done
+
+    Different from `PluginScheduler`, which returns whole stages, a slow node only delays the nodes that actually
+    depend on it.
+    """
+
+    def __init__(self, dependencies: Dict[Hashable, Iterable[Hashable]], max_workers: int = 1):
+        self.dependencies = {node: tuple(requires) for node, requires in dependencies.items()}
+        self.max_workers = max(1, max_workers)
+        self.timings: Dict[Hashable, NodeTiming] = {}
+        self._order = self._topological_order()
+        self._position = {node: index for index, node in enumerate(self._order)}
+
+    def _topological_order(self) -> List[Hashable]:
+        """Return nodes in a deterministic order that respects dependencies (raise `RuntimeError` on loops)"""
+        unknown = {dep for requires in self.dependencies.values() for dep in requires if dep not in self.dependencies}
+        if unknown:
+            raise RuntimeError(f"Detected inconsistency in requirements - unknown: {sorted(map(str, unknown))}")
+        order, done, remaining = [], set(), list(self.dependencies.keys())
+        while remaining:
+            ready = [node for node in remaining if all(dep in done for dep in self.dependencies[node])]
+            if not ready:
+                raise RuntimeError(f"Detected inconsistency in requirements - remaining: {remaining}")
+            done.update(ready)
+            order.extend(ready)
+            remaining = [node for node in remaining if node not in done]
+        return order
+
+    @property
+    def order(self) -> List[Hashable]:
+        return list(self._order)
+
+    def run(
+        self,
+        func: Callable[[Hashable], Any],
+        on_done: Union[Callable[[Hashable, Any], None], None] = None,
+    ) -> Dict[Hashable, Any]:
+        """Execute `func(node)` for all nodes and return a dict with the results
+
+        `on_done(node, result)` is called (in the caller's thread) as soon as each node finishes. If any of the tasks
+        raises an exception, no new task is started and the exception is raised after the running ones finish.
+        """
+        self.timings = {}
+        pending_count = {node: len(requires) for node, requires in self.dependencies.items()}
+        dependents = {node: [] for node in self.dependencies}
+        for node, requires in self.dependencies.items():
+            for dep in requires:
+                dependents[dep].append(node)
+        results = {}
+        start_time = time.perf_counter()
+
+        def execute(node):
+            started_at = time.perf_counter() - start_time
+            try:
+                return func(node)
+            finally:
+                self.timings[node] = NodeTiming(started_at=started_at, finished_at=time.perf_counter() - start_time)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            for node in self._order:
+                if pending_count[node] == 0:
+                    running[pool.submit(execute, node)] = node
+            error = None
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in sorted(finished, key=lambda future: self._position[running[future]]):
+                    node = running.pop(future)
+                    if future.exception() is not None:
+                        error = error or future.exception()
+                        continue
+                    results[node] = future.result()
+                    if on_done is not None:
+                        on_done(node, results[node])
+                    if error is not None:
+                        continue
+                    for dependent in dependents[node]:
+                        pending_count[dependent] -= 1
+                        if pending_count[dependent] == 0:
+                            running[pool.submit(execute, dependent)] = dependent
+            if error is not None:
+                raise error
+        return results
+
+    def critical_path(self) -> List[Hashable]:
+        """Return the chain of dependent nodes with the biggest total duration (based on the last `run`)"""
+        cost, previous = {}, {}
+        for node in self._order:
+            if node not in self.timings:
+                continue
+            best = None
+            for dep in self.dependencies[node]:
+                if dep in cost and (best is None or cost[dep] > cost[best]):
+                    best = dep
+            previous[node] = best
+            cost[node] = self.timings[node].duration + (cost[best] if best is not None else 0)
+        if not cost:
+            return []
+        node = max(cost, key=cost.get)
+        path = []
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        return path[::-1]
@@ -0,0 +1,288 @@
+import functools
+import ipaddress
+import os
+import re
+import shlex
+import tarfile
+import tempfile
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Callable, Dict, List, Tuple, Union
+
+from .models import App, Command, Domain, Redirect, Storage
+from .utils import parse_timestamp
+
+# Env vars as in `/usr/bin/dokku`
+DOKKU_ROOT = os.environ.get("DOKKU_ROOT", "~dokku")
+DOKKU_LIB_ROOT = os.environ.get("DOKKU_LIB_ROOT", "/var/lib/dokku")
+REGEXP_APP_NAME = re.compile(r"^[a-z0-9][^/:_A-Z]*$")
+# Lists (relative to `/`) everything the readers use and sends it as a gzipped tar stream, after a line with the marker
+# and `$DOKKU_ROOT` (so the paths can be mapped back). Only paths which exist are listed, so `tar` won't fail for them.
+SNAPSHOT_ROOT_MARKER = "@pydokku-snapshot-root"
+SNAPSHOT_SCRIPT = """
+lib={lib}
+root={root}
+printf '%s %s\\n' '{marker}' "$root"
+cd / || exit 1
+{{
+  find "${{lib#/}}/config"
+  for path in "${{lib#/}}"/plugins/available/*/.git/HEAD "${{lib#/}}"/plugins/available/*/.git/config; do
+    echo "$path"
+  done
+  echo "${{root#/}}/ENV"; echo "${{root#/}}/VHOST"
+  for app in "${{root#/}}"/*/; do
+    app="${{app%/}}"
+    echo "$app"
+    for name in ENV VHOST REDIRECTS DOCKER_OPTIONS_DEPLOY DOCKER_OPTIONS_RUN .deploy.lock; do
+      echo "$app/$name"
+    done
+    if [ -f "$app/DOCKER_OPTIONS_DEPLOY" ]; then
+      sed -n 's|^-v /\\([^:]*\\):.*|\\1|p' "$app/DOCKER_OPTIONS_DEPLOY"
+    fi
+  done
+}} 2>/dev/null | while IFS= read -r path; do [ -e "$path" ] && echo "$path"; done | tar -czf - --no-recursion -T -
+"""
+
+
+def fallback_on_error(method: Callable) -> Callable:
+    """Return `None` (so the caller executes the Dokku command instead) if the files can't be read or parsed"""
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        except (OSError, ValueError):
+            return None
+
+    return wrapper
+
+
+def read_env_file(filename: Path) -> Dict[str, str]:
+    """Parse an `ENV` file, which has `export KEY='value'` lines (values may have newlines inside the quotes)
+
+    >>> import tempfile
+    >>> with tempfile.NamedTemporaryFile(mode="w", suffix="ENV") as fobj:
+    ...     _ = fobj.write("export A='1'\\nexport B='it'\\\\''s\\nmultiline'\\n")
+    ...     fobj.flush()
+    ...     read_env_file(Path(fobj.name))
+    {'A': '1', 'B': "it's\\nmultiline"}
+    """
+    if not filename.exists():
+        return {}
+    result = {}
+    for token in shlex.split(filename.read_text()):
+        if token == "export":
+            continue
+        key, separator, value = token.partition("=")
+        if not separator:
+            raise ValueError(f"Invalid line in {filename}: {repr(token)}")
+        result[key] = value
+    return result
+
+
+def read_lines(filename: Path) -> List[str]:
+    if not filename.exists():
+        return []
+    return [line.strip() for line in filename.read_text().splitlines() if line.strip()]
+
+
+class FilesystemReader:
+    """Read Dokku's state from the files it creates, so no `dokku` process is needed (must run as `root`/`dokku`)
+
+    Each method returns `None` if the information can't be read (missing app, permission denied, unknown format etc.),
+    so the plugin executes the Dokku command instead.
+    """
+
+    def __init__(self, root_path: Union[Path, str] = DOKKU_ROOT, lib_path: Union[Path, str] = DOKKU_LIB_ROOT):
+        self.root_path = Path(root_path).expanduser()
+        self.lib_path = Path(lib_path)
+
+    def available(self) -> bool:
+        return self.root_path.is_dir() and os.access(self.root_path, os.R_OK | os.X_OK)
+
+    def dokku_path(self, path: Path) -> Path:
+        """Convert a path read by this object to the path Dokku uses"""
+        return path
+
+    def path_owner(self, path: Union[Path, str]) -> Union[Tuple[int, int], None]:
+        """Return `(user_id, group_id)` of a path in Dokku's host (or `None` if unknown)"""
+        try:
+            info = os.stat(path)
+        except OSError:
+            return None
+        return info.st_uid, info.st_gid
+
+    def _app_path(self, app_name: str) -> Path:
+        """Return the app's home (raises `ValueError` if the app does not exist, so the command reports the error)"""
+        path = self.root_path / app_name
+        if not REGEXP_APP_NAME.match(app_name) or not path.is_dir():
+            raise ValueError(f"App not found: {app_name}")
+        return path
+
+    def _property(self, plugin: str, app_name: str, name: str) -> Union[str, None]:
+        filename = self.lib_path / "config" / plugin / app_name / name
+        return filename.read_text().strip() if filename.exists() else None
+
+    def _apps_names(self) -> List[str]:
+        # Same as `dokku_apps` in Dokku's `common/functions`
+        return sorted(
+            path.name
+            for path in self.root_path.iterdir()
+            if path.is_dir() and not path.name.startswith(".") and path.name != "tls"
+        )
+
+    @fallback_on_error
+    def apps(self) -> Union[List[App], None]:
+        result = []
+        for app_name in self._apps_names():
+            path = self.root_path / app_name
+            result.append(
+                App(
+                    name=app_name,
+                    path=self.dokku_path(path),
+                    locked=(path / ".deploy.lock").exists(),
+                    created_at=parse_timestamp(self._property("apps", app_name, "created-at")),
+                    deploy_source=self._property("apps", app_name, "deploy-source") or None,
+                    deploy_source_metadata=self._property("apps", app_name, "deploy-source-metadata") or None,
+                )
+            )
+        return result
+
+    @fallback_on_error
+    def config(self, app_name: Union[str, None], merged: bool = False) -> Union[Dict[str, str], None]:
+        """Same as `config:export --format=json` (global config if `app_name` is `None`)"""
+        global_config = read_env_file(self.root_path / "ENV")
+        if app_name is None:
+            return global_config
+        app_config = read_env_file(self._app_path(app_name) / "ENV")
+        return {**global_config, **app_config} if merged else app_config
+
+    def _global_domains(self) -> Domain:
+        domains = read_lines(self.root_path / "VHOST")
+        # Same as `is_global_vhost_enabled`: disabled if there's no VHOST file or if it has an IP address
+        enabled = bool(domains)
+        for domain in domains:
+            try:
+                ipaddress.ip_address(domain)
+            except ValueError:
+                continue
+            enabled = False
+        return Domain(app_name=None, enabled=enabled, domains=domains)
+
+    def _app_domains(self, app_name: str) -> Domain:
+        path = self._app_path(app_name)
+        enabled = read_env_file(path / "ENV").get("NO_VHOST") != "1"
+        return Domain(app_name=app_name, enabled=enabled, domains=read_lines(path / "VHOST"))
+
+    @fallback_on_error
+    def domains(self, app_name: Union[str, None] = None) -> Union[List[Domain], None]:
+        """Same as `domains:report` (global and all apps if `app_name` is `None`)"""
+        if app_name is not None:
+            return [self._app_domains(app_name)]
+        return [self._global_domains()] + [self._app_domains(name) for name in self._apps_names()]
+
+    @fallback_on_error
+    def redirects(self, app_name: str) -> Union[List[Redirect], None]:
+        result = []
+        for line in read_lines(self._app_path(app_name) / "REDIRECTS"):
+            source, destination, code = line.split(":")
+            result.append(Redirect(app_name=app_name, source=source, destination=destination, code=int(code)))
+        return result
+
+    @fallback_on_error
+    def storage(self, app_name: str) -> Union[List[Storage], None]:
+        """Same as `storage:list`, which reads the `-v` options of the deploy phase"""
+        result = []
+        for line in read_lines(self._app_path(app_name) / "DOCKER_OPTIONS_DEPLOY"):
+            option, _, mount = line.partition(" ")
+            if option not in ("-v", "--volume"):
+                continue
+            host_path, container_path = mount.strip().split(":", maxsplit=2)[:2]  # Options (like `:ro`) are ignored
+            result.append(Storage(app_name=app_name, host_path=host_path, container_path=container_path))
+        return result
+
+    @fallback_on_error
+    def plugin_app_config(self, plugin_name: str, app_name: str) -> Union[Dict[str, str], None]:
+        """Same as `Dokku.plugin_app_config`: the plugin's properties for an app"""
+        path = self.lib_path / "config" / plugin_name / app_name
+        if not path.exists():
+            return {}
+        return {  # Read as bytes so line endings are kept and hidden files are skipped, like in the command
+            filename.name: filename.read_bytes().decode("utf-8", errors="replace")
+            for filename in sorted(path.iterdir())
+            if filename.is_file() and not filename.name.startswith(".")
+        }
+
+    @fallback_on_error
+    def plugin_git_files(self, plugin_name: str) -> Union[Tuple[Union[str, None], Union[str, None]], None]:
+        """Return the contents of `.git/HEAD` and `.git/config` of a plugin (`None` for the missing ones)"""
+        git_path = self.lib_path / "plugins" / "available" / plugin_name / ".git"
+        head, config = git_path / "HEAD", git_path / "config"
+        return (head.read_text() if head.exists() else None, config.read_text() if config.exists() else None)
+
+
+class SnapshotReader(FilesystemReader):
+    """Read Dokku's files from a snapshot (a tar stream created by `SNAPSHOT_SCRIPT`) extracted to a temp directory
+
+    Only directories and regular files are extracted (owners are kept in memory, for `path_owner`). Call `close` to
+    remove the temporary directory.
+    """
+
+    def __init__(self, fileobj: BinaryIO, root_path: Union[Path, str], lib_path: Union[Path, str]):
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="pydokku-snapshot-")
+        self.base_path = Path(self._temp_dir.name)
+        self.owners: Dict[str, Tuple[int, int]] = {}
+        with tarfile.open(fileobj=fileobj, mode="r:gz") as archive:
+            for member in archive:
+                name = PurePosixPath(member.name)
+                if name.is_absolute() or ".." in name.parts:
+                    continue
+                self.owners[str(name)] = (member.uid, member.gid)
+                target = self.base_path / name
+                if member.isdir():
+                    target.mkdir(parents=True, exist_ok=True)
+                elif member.isfile():
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    with archive.extractfile(member) as source:
+                        target.write_bytes(source.read())
+        super().__init__(
+            root_path=self.base_path / str(root_path).lstrip("/"), lib_path=self.base_path / str(lib_path).lstrip("/")
+        )
+
+    def dokku_path(self, path: Path) -> Path:
+        return Path("/") / path.relative_to(self.base_path)
+
+    def path_owner(self, path: Union[Path, str]) -> Union[Tuple[int, int], None]:
+        return self.owners.get(str(PurePosixPath(path)).lstrip("/"))
+
+    def close(self):
+        self._temp_dir.cleanup()
+
+
+def fetch_snapshot(dokku, root_path: Union[str, None] = None) -> SnapshotReader:
+    """Download the files read by `FilesystemReader` from the Dokku host in a single compressed tar stream
+
+    `root_path` is `$DOKKU_ROOT` in the host (`~dokku` if not provided). Raises `RuntimeError` if the user has no
+    filesystem access (SSH user `dokku`) or the snapshot can't be created.
+    """
+    if not dokku.can_execute_regular_commands:
+        raise RuntimeError("Cannot fetch a snapshot: SSH user `dokku` has no filesystem access")
+    root = shlex.quote(root_path) if root_path is not None else "~dokku"
+    script = SNAPSHOT_SCRIPT.format(lib=shlex.quote(str(dokku.lib_root)), root=root, marker=SNAPSHOT_ROOT_MARKER)
+    command = Command(["sh", "-c", script], check=False, sudo=dokku.requires_sudo)
+    return_code, stdout, stderr = dokku.execute_spooled(command)
+    with stdout:
+        if return_code != 0:
+            raise RuntimeError(f"Cannot fetch a snapshot (exit code {return_code}): {stderr.strip()}")
+        # The root is read from stdout, since stderr may have other messages (like SSH warnings). Lines before the
+        # marker (like ones printed by a login shell) are ignored.
+        marker, root_path = SNAPSHOT_ROOT_MARKER.encode("ascii") + b" ", ""
+        for line in iter(stdout.readline, b""):
+            if line.startswith(marker):
+                root_path = line[len(marker) :].decode("utf-8").strip()
+                break
+        if not root_path.startswith("/"):
+            raise RuntimeError(f"Cannot fetch a snapshot: unknown Dokku root {repr(root_path)}")
+        try:
+            return SnapshotReader(stdout, root_path=root_path, lib_path=dokku.lib_root)
+        except tarfile.TarError as exc:
+            raise RuntimeError(f"Cannot fetch a snapshot: {exc}")
@@ -0,0 +1,125 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Union
+
+from .cache import dokku_subcommand, positional_params
+from .models import Command
+
+
+@dataclass
+class CommandEvent:
+    """Execution of one command, passed to `Dokku.on_command_start` (not finished yet) and `Dokku.on_command_end`
+
+    `started_at` and `finished_at` are `time.perf_counter()` values, `argv` is the command actually executed (with
+    `sudo`/SSH prefixes, if needed).
+    """
+
+    command: Command
+    argv: List[str]
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: Union[float, None] = None
+    return_code: Union[int, None] = None
+    stdout_bytes: Union[int, None] = None
+    stderr_bytes: Union[int, None] = None
+
+    @property
+    def duration(self) -> Union[float, None]:
+        return self.finished_at - self.started_at if self.finished_at is not None else None
+
+    @property
+    def subcommand(self) -> str:
+        """Dokku subcommand (like `ps:report`) or the program name for other commands (like `cat`)
+
+        >>> CommandEvent(Command(["dokku", "ps:report", "app"]), argv=[]).subcommand
+        'ps:report'
+        >>> CommandEvent(Command(["cat", "/etc/hosts"], sudo=True), argv=[]).subcommand
+        'cat'
+        """
+        cmd = self.command.command
+        if cmd[0] == "dokku" and len(cmd) > 1:
+            return cmd[1]
+        return cmd[0]
+
+    @property
+    def app_name(self) -> Union[str, None]:
+        """First positional parameter of a Dokku command (usually the app name), `None` for other commands
+
+        >>> CommandEvent(Command(["dokku", "config:set", "--encoded", "app", "KEY=c2VjcmV0"]), argv=[]).app_name
+        'app'
+        >>> CommandEvent(Command(["dokku", "network:list", "--format", "json"]), argv=[]).app_name is None
+        True
+        """
+        if dokku_subcommand(self.command) is None:
+            return None
+        params = positional_params(self.command.command[2:])
+        return params[0] if params else None
+
+    def finish(self, return_code: int, stdout: str, stderr: str):
+        self.finished_at = time.perf_counter()
+        self.return_code = return_code
+        self.stdout_bytes = len(stdout.encode("utf-8"))
+        self.stderr_bytes = len(stderr.encode("utf-8"))
+
+
+@dataclass
+class SubcommandStats:
+    count: int = 0
+    failures: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    stdout_bytes: int = 0
+    stderr_bytes: int = 0
+
+
+class CommandStats:
+    """Aggregate finished commands by subcommand - use it as a hook: `dokku.on_command_end.append(CommandStats())`"""
+
+    def __init__(self):
+        self.subcommands: Dict[str, SubcommandStats] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: CommandEvent):
+        with self._lock:
+            stats = self.subcommands.setdefault(event.subcommand, SubcommandStats())
+            stats.count += 1
+            stats.failures += int(event.return_code != 0)
+            stats.total_time += event.duration
+            stats.max_time = max(stats.max_time, event.duration)
+            stats.stdout_bytes += event.stdout_bytes
+            stats.stderr_bytes += event.stderr_bytes
+
+    @property
+    def total_time(self) -> float:
+        return sum(stats.total_time for stats in self.subcommands.values())
+
+    def summary(self) -> str:
+        """Return a table with the subcommands, sorted by total time (slowest first)
+
+        >>> stats = CommandStats()
+        >>> event = CommandEvent(Command(["dokku", "ps:report"]), argv=[], started_at=1.0)
+        >>> event.finish(0, "abc", "")
+        >>> event.finished_at = 3.5
+        >>> stats(event)
+        >>> print(stats.summary())
+        subcommand  count  failures  total (s)  max (s)  stdout (bytes)
+        ps:report       1         0      2.500    2.500               3
+        """
+        header = ("subcommand", "count", "failures", "total (s)", "max (s)", "stdout (bytes)")
+        rows = [
+            (
+                subcommand,
+                str(stats.count),
+                str(stats.failures),
+                f"{stats.total_time:.3f}",
+                f"{stats.max_time:.3f}",
+                str(stats.stdout_bytes),
+            )
+            for subcommand, stats in sorted(self.subcommands.items(), key=lambda item: -item[1].total_time)
+        ]
+        widths = [max(len(row[index]) for row in [header] + rows) for index in range(len(header))]
+        lines = []
+        for row in [header] + rows:
+            cells = [row[0].ljust(widths[0])] + [value.rjust(width) for value, width in zip(row[1:], widths[1:])]
+            lines.append("  ".join(cells).rstrip())
+        return "\n".join(lines)
@@ -1,11 +1,11 @@
 import base64
 import datetime
 import shlex
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
 from typing import Dict, List, Literal, Union
 
-from .utils import parse_iso_format
+from .utils import Stdin, parse_iso_format
 
 
 class BaseModel:
@@ -16,17 +16,25 @@ class BaseModel:
 @dataclass
 class Command(BaseModel):
     command: List[str]
-    stdin: str = None
+    stdin: Stdin = None  # Text, bytes, a file path, a binary file object or an iterable of bytes chunks
     check: bool = True
     sudo: bool = False
+    # Whether the command only reads state (`None` if unknown) - set by the plugins and used by the cache
+    read_only: Union[bool, None] = field(default=None, compare=False, repr=False)
 
     def __str__(self):
         command = (["sudo"] if self.sudo else []) + self.command
         cmd_txt = shlex.join(command)
         if self.stdin is None:
             return cmd_txt
-        encoded = base64.b64encode(self.stdin.encode("utf-8")).decode("ascii")
-        return f"echo {encoded} | base64 --decode | {cmd_txt}"
+        elif isinstance(self.stdin, (str, bytes)):
+            data = self.stdin.encode("utf-8") if isinstance(self.stdin, str) else self.stdin
+            encoded = base64.b64encode(data).decode("ascii")
+            return f"echo {encoded} | base64 --decode | {cmd_txt}"
+        filename = self.stdin if isinstance(self.stdin, Path) else getattr(self.stdin, "name", None)
+        if isinstance(filename, (str, Path)):
+            return f"{cmd_txt} < {shlex.quote(str(filename))}"
+        return f"{cmd_txt}  # stdin: binary stream"
 
 
 @dataclass
@@ -1,19 +1,137 @@
-from .apps import AppsPlugin  # noqa
-from .checks import ChecksPlugin  # noqa
-from .config import ConfigPlugin  # noqa
-from .domains import DomainsPlugin  # noqa
-from .git import GitPlugin  # noqa
-from .letsencrypt import LetsEncryptPlugin  # noqa
-from .maintenance import MaintenancePlugin  # noqa
-from .network import NetworkPlugin  # noqa
-from .nginx import NginxPlugin  # noqa
-from .plugin import PluginPlugin  # noqa
-from .ports import PortsPlugin  # noqa
-from .proxy import ProxyPlugin  # noqa
-from .ps import PsPlugin  # noqa
-from .redirect import RedirectPlugin  # noqa
-from .ssh_keys import SSHKeysPlugin  # noqa
-from .storage import StoragePlugin  # noqa
+import importlib
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Type
+
+# Plugins are imported (and instantiated) only when first used. Values are `module:class`, as in entry points.
+BUILTIN_PLUGINS = {
+    "apps": "pydokku.plugins.apps:AppsPlugin",
+    "checks": "pydokku.plugins.checks:ChecksPlugin",
+    "config": "pydokku.plugins.config:ConfigPlugin",
+    "domains": "pydokku.plugins.domains:DomainsPlugin",
+    "git": "pydokku.plugins.git:GitPlugin",
+    "letsencrypt": "pydokku.plugins.letsencrypt:LetsEncryptPlugin",
+    "maintenance": "pydokku.plugins.maintenance:MaintenancePlugin",
+    "network": "pydokku.plugins.network:NetworkPlugin",
+    "nginx": "pydokku.plugins.nginx:NginxPlugin",
+    "plugin": "pydokku.plugins.plugin:PluginPlugin",
+    "ports": "pydokku.plugins.ports:PortsPlugin",
+    "proxy": "pydokku.plugins.proxy:ProxyPlugin",
+    "ps": "pydokku.plugins.ps:PsPlugin",
+    "redirect": "pydokku.plugins.redirect:RedirectPlugin",
+    "ssh_keys": "pydokku.plugins.ssh_keys:SSHKeysPlugin",
+    "storage": "pydokku.plugins.storage:StoragePlugin",
+}
+_CLASSES = {value.split(":")[1]: value for value in BUILTIN_PLUGINS.values()}
+ENTRY_POINT_GROUP = "pydokku.plugins"
+
+
+def load_class(spec: str) -> Type:
+    """Import a `module:class` spec and return the class
+
+    >>> load_class("pydokku.plugins.apps:AppsPlugin").name
+    'apps'
+    """
+    module_name, _, class_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def __getattr__(name: str):
+    # Keep `from pydokku.plugins import AppsPlugin` working without importing all the plugins (PEP 562)
+    if name in _CLASSES:
+        return load_class(_CLASSES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + list(_CLASSES.keys()))
+
+
+def discover_plugins(group: str = ENTRY_POINT_GROUP) -> Dict[str, str]:
+    """Return `name: "module:class"` for the plugins declared in packages' entry points (nothing is imported)
+
+    A package registers its `DokkuPlugin` subclasses in its metadata, like in `pyproject.toml`:
+
+        [project.entry-points."pydokku.plugins"]
+        postgres = "mycompany_dokku.postgres:PostgresPlugin"
+    """
+    from importlib.metadata import entry_points  # noqa
+
+    return {entry_point.name: entry_point.value for entry_point in entry_points(group=group)}
+
+
+class PluginRegistry(Mapping):
+    """Map plugin names to plugin instances, importing and instantiating each plugin on first access
+
+    `factory` receives the plugin class and returns the instance. Iterating over the names (or checking if a name is
+    available) does not import any plugin, but `values()` and `items()` load all of them. Third-party plugins (see
+    `discover_plugins`) are looked up only when a name is not a built-in one or when all names are needed, and
+    can't replace built-in plugins. A third-party plugin which can't be loaded raises `RuntimeError` when accessed
+    directly, is skipped by `values()`/`items()` and is removed from the registry (the error is kept in `errors`).
+    """
+
+    def __init__(self, factory: Callable, specs: Dict[str, str] = None, entry_points: bool = True):
+        self._factory = factory
+        self._specs = dict(specs if specs is not None else BUILTIN_PLUGINS)
+        self._instances = {}
+        self._discovered = not entry_points
+        self.errors: Dict[str, Exception] = {}
+
+    def _discover(self):
+        if not self._discovered:
+            self._discovered = True
+            for name, spec in discover_plugins().items():
+                self._specs.setdefault(name, spec)
+
+    def __getitem__(self, name: str):
+        if name not in self._instances:
+            if name not in self:
+                raise KeyError(name)
+            elif name in BUILTIN_PLUGINS:
+                self._instances[name] = self._load(name)
+            else:
+                try:
+                    self._instances[name] = self._load(name)
+                except Exception as exc:  # Anything may happen when importing other packages' code
+                    spec = self._specs.pop(name)
+                    self.errors[name] = exc
+                    raise RuntimeError(f"Cannot load plugin {repr(name)} ({spec}): {exc}") from exc
+        return self._instances[name]
+
+    def _load(self, name: str):
+        klass = load_class(self._specs[name])
+        if klass.name != name:
+            raise ValueError(f"Plugin registered as {repr(name)} has a different name: {repr(klass.name)}")
+        return self._factory(klass)
+
+    def items(self) -> List[Tuple[str, Any]]:
+        result = []
+        for name in self:
+            try:
+                result.append((name, self[name]))
+            except RuntimeError:
+                if name not in self.errors:
+                    raise
+        return result
+
+    def values(self) -> List:
+        return [plugin for _, plugin in self.items()]
+
+    def __iter__(self) -> Iterator[str]:
+        self._discover()
+        return iter(list(self._specs))
+
+    def __len__(self) -> int:
+        self._discover()
+        return len(self._specs)
+
+    def __contains__(self, name) -> bool:
+        if name not in self._specs:
+            self._discover()
+        return name in self._specs
+
+    def loaded(self) -> Dict:
+        """Plugins already instantiated"""
+        return dict(self._instances)
 
 
 # Service plugins - maybe add service:links (service:info is per service and costly)
@@ -1,6 +1,6 @@
 import re
 from functools import lru_cache
-from typing import List, Union
+from typing import List, Tuple, Union
 
 from ..models import App, Command
 from ..utils import get_stdout_rows_parser, parse_bool, parse_path, parse_timestamp
@@ -39,10 +39,17 @@ class AppsPlugin(DokkuPlugin):
             },
         )
 
-    def list(self) -> List[App]:
+    def _report_command(self) -> Command:
         # Dokku WILL return error in this `report` command, so `check=False` is used in all `:report/list` because of
         # this inconsistent behavior <https://github.com/dokku/dokku/issues/7454>
-        _, stdout, stderr = self._evaluate("report", check=False, full_return=True, execute=True)
+        return self._evaluate("report", check=False, execute=False)
+
+    def _list_command(self) -> Union[Command, None]:
+        # If Dokku's files are available, `list` reads them instead (and may fall back to the command)
+        return self._report_command() if self.dokku.filesystem is None else None
+
+    def _list_parse(self, result: Tuple[int, str, str]) -> List[App]:
+        _, stdout, stderr = result
         if not stdout and "You haven't deployed any applications yet" in stderr:
             return []
         elif stderr:
@@ -50,6 +57,13 @@ class AppsPlugin(DokkuPlugin):
         rows_parser = self._get_rows_parser()
         return [App(**row) for row in rows_parser(stdout)]
 
+    def list(self) -> List[App]:
+        if self.dokku.filesystem is not None:
+            apps = self.dokku.filesystem.apps()
+            if apps is not None:
+                return apps
+        return self._list_parse(self._execute(self._report_command()))
+
     def create(self, name: str, execute: bool = True) -> Union[str, Command]:
         return self._evaluate("create", params=[name], execute=execute)
 
@@ -75,6 +89,9 @@ class AppsPlugin(DokkuPlugin):
     def object_list(self, apps: List[App], system: bool = True) -> List[App]:
         return apps
 
+    def object_app_name(self, obj: App) -> str:
+        return obj.name
+
     def object_create(
         self, obj: App, skip_system: bool = False, execute: bool = True
     ) -> Union[List[str], List[Command]]:
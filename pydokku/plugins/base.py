@@ -1,9 +1,9 @@
 from collections import defaultdict
 from itertools import groupby
-from typing import Any, Iterator, List, Tuple, Type, TypeVar, Union
+from typing import Any, Dict, Iterator, List, Tuple, Type, TypeVar, Union
 
 from ..models import App, Command
-from ..utils import dataclass_field_set
+from ..utils import Stdin, StreamingProcess, dataclass_field_set
 
 T = TypeVar("T")
 
@@ -19,6 +19,7 @@ class DokkuPlugin:
     requires_extra_commands: bool = (
         None  # Requires extra commands to be executed to export all data required to recreate the same environment
     )
+    read_only_operations: Tuple[str] = ("report", "list")  # Operations which don't change any state
 
     def __init__(self, dokku):
         self.dokku = dokku
@@ -27,27 +28,56 @@ class DokkuPlugin:
         self,
         operation: Union[str, None],
         params: Union[List[str], None] = None,
-        stdin: str = None,
+        stdin: Stdin = None,
         check: bool = True,
         sudo: bool = False,
         execute: bool = True,
         full_return: bool = False,
-    ) -> Union[str, Command, Tuple[int, str, str]]:
+        stream: bool = False,
+    ) -> Union[str, Command, Tuple[int, str, str], StreamingProcess]:
         subcommand = f"{self.subcommand}:{operation}" if operation is not None else self.subcommand
         cmd = Command(
             command=["dokku", subcommand] + (params if params is not None else []),
             stdin=stdin,
             check=check,
             sudo=sudo,
+            read_only=self._is_read_only(operation, params or []),
         )
         if not execute:
             return cmd
+        elif stream:
+            return self.dokku.execute_stream(cmd)
         return_code, stdout, stderr = self._execute(cmd)
         return stdout if not full_return else (return_code, stdout, stderr)
 
+    def _is_read_only(self, operation: Union[str, None], params: List[str]) -> bool:
+        """Classify an operation as read (its results can be cached) or write (invalidates cached results)"""
+        return operation in self.read_only_operations
+
     def _execute(self, command: Command) -> Tuple[int, str, str]:
         return self.dokku._execute(command)
 
+    def check_result(self, command: Command, return_code: int, stdout: str, stderr: str):
+        """Raise an exception if the result of a command created by this plugin means it failed
+
+        Only needed for failures which `Command.check` can't detect (like errors printed by a command which exits
+        with `0`). It's called by the methods which execute the commands and by the ones executing the commands
+        returned with `execute=False` (like `dokku apply --batch`).
+        """
+        return
+
+    def _list_command(self, *args, **kwargs) -> Union[Command, None]:
+        """Return the only command executed by `list(*args, **kwargs)` (`None` if it may execute more than one)
+
+        Plugins implementing it must also implement `_list_parse`, so `AsyncDokku` can await the command and parse its
+        result instead of running `list`.
+        """
+        return None
+
+    def _list_parse(self, result: Tuple[int, str, str], *args, **kwargs) -> List[T]:
+        """Parse the result of the command returned by `_list_command(*args, **kwargs)`"""
+        raise NotImplementedError(f"Method `_list_parse` not implemented for {self.__class__.__name__}")
+
     def object_list(self, apps: List[App], system: bool = True) -> List[T]:
         """List all objects for this specific plugin"""
         # TODO: should always sort (as network objects are sort in `test_export_apply`?)
@@ -76,16 +106,43 @@ class DokkuPlugin:
         # exported as commands correctly.
         raise NotImplementedError(f"Class {self.__class__.__name__} does not implement `object_create`")
 
-    def object_create_many(self, objs: List[T], execute: bool = True) -> Union[Iterator[str], Iterator[Command]]:
+    def object_create_many(
+        self, objs: List[T], execute: bool = True, skip_system: bool = False
+    ) -> Union[Iterator[str], Iterator[Command]]:
         # The difference between this and calling `self.object_create` for each object is that this one yields only one
         # global command, so it's faster.
         # Since a plugin can have many object types, we batch the execution for each type, this way each of them can
         # properly receive the `skip_system` parameter. The order of `object_classes` parameter is respected.
+        # If `skip_system` is `True`, the global settings are not created for any of the objects (they're expected to
+        # be created by another call).
         type_order = {type_: index for index, type_ in enumerate(self.object_classes)}
         objs.sort(key=lambda obj: type_order[type(obj)])
         for _, group_objs in groupby(objs, key=type):
             for index, obj in enumerate(group_objs):
-                yield from self.object_create(obj=obj, skip_system=index > 0, execute=execute)
+                yield from self.object_create(obj=obj, skip_system=skip_system or index > 0, execute=execute)
+
+    def object_app_name(self, obj: T) -> Union[str, None]:
+        """Return the name of the app an object belongs to (`None` for system objects)"""
+        return getattr(obj, "app_name", None)
+
+    def object_split_by_app(self, objs: List[T]) -> Tuple[List[T], Dict[str, List[T]]]:
+        """Split objects into the ones that must be created before any app (system ones) and the ones for each app
+
+        Some plugins hide the global settings in the app objects (like `ps`, where the global procfile path is in every
+        `ProcessInfo`), so if there's no system object for a type, the first object of that type is considered a
+        system one. This way, calling `object_create_many` for the system objects and then calling it with
+        `skip_system=True` for each app's objects is equivalent to calling it once for all of them.
+        """
+        system_objs, apps_objs = [], {}
+        system_types = set(type(obj) for obj in objs if self.object_app_name(obj) is None)
+        for obj in objs:
+            app_name = self.object_app_name(obj)
+            if app_name is None or type(obj) not in system_types:
+                system_types.add(type(obj))
+                system_objs.append(obj)
+            else:
+                apps_objs.setdefault(app_name, []).append(obj)
+        return system_objs, apps_objs
 
     # TODO: define an interface for `ensure_object` and implement it in current plugins and in CLI (add TODOs for
     # testing this new method in each plugin and a general test with clean + apply + export1 + ensure + export2 + clean
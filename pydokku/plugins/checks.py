@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import List, Union
+from typing import List, Tuple, Union
 
 from ..models import App, Check, Command
 from ..utils import clean_stderr, get_stdout_rows_parser, parse_comma_separated_list, parse_int
@@ -81,24 +81,14 @@ class ChecksPlugin(DokkuPlugin):
                         )
         return result
 
-    def list(self, app_name: Union[str, None] = None) -> List[Check]:
-        """List disabled and skipped checks for an app
-
-        WARNING: Dokku doesn't list the enabled checks! You must call
-        `dokku ps:inspect <app-name> | grep com.dokku.process-type` to check all running process types. Dokku also does
-        not provide an way to retrieve the 'wait-to-retire' global option unless we take it from the app listing,
-        so if you haven't created any app, you wouldn't know the global wait to retire setting.
-        """
+    def _list_command(self, app_name: Union[str, None] = None) -> Command:
         # Dokku won't return error in this `report` command, but `check=False` is used in all `:report/list` because of
         # this inconsistent behavior <https://github.com/dokku/dokku/issues/7454>
         system = app_name is None
-        _, stdout, stderr = self._evaluate(
-            "report",
-            params=[] if system else [app_name],
-            check=False,
-            full_return=True,
-            execute=True,
-        )
+        return self._evaluate("report", params=[] if system else [app_name], check=False, execute=False)
+
+    def _list_parse(self, result: Tuple[int, str, str], app_name: Union[str, None] = None) -> List[Check]:
+        _, stdout, stderr = result
         if "You haven't deployed any applications yet" in clean_stderr(stderr):
             # TODO: create temp app so we can get global wait to retire?
             return []
@@ -108,6 +98,16 @@ class ChecksPlugin(DokkuPlugin):
         parsed_rows = rows_parser(stdout)
         return self._convert_rows(parsed_rows, app_name)
 
+    def list(self, app_name: Union[str, None] = None) -> List[Check]:
+        """List disabled and skipped checks for an app
+
+        WARNING: Dokku doesn't list the enabled checks! You must call
+        `dokku ps:inspect <app-name> | grep com.dokku.process-type` to check all running process types. Dokku also does
+        not provide an way to retrieve the 'wait-to-retire' global option unless we take it from the app listing,
+        so if you haven't created any app, you wouldn't know the global wait to retire setting.
+        """
+        return self._list_parse(self._execute(self._list_command(app_name)), app_name)
+
     def set(self, app_name: Union[str, None], key: str, value: int, execute: bool = True) -> Union[str, Command]:
         """Set app's property"""
         system = app_name is None
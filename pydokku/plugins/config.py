@@ -26,6 +26,7 @@ class ConfigPlugin(DokkuPlugin):
     object_classes = (Config,)
     requires = ("apps",)
     requires_extra_commands = False
+    read_only_operations = ("report", "list", "export", "get", "keys", "show")
 
     def get(
         self, app_name: Union[str, None], merged: bool = False, hide_internal: bool = True, as_dict: bool = False
@@ -37,13 +38,15 @@ class ConfigPlugin(DokkuPlugin):
         # `DOKKU_`, a list of "skip vars" must be made manually.
         # `dokku config <--global|app_name>` does not encode values, so we can't parse correctly if values have
         # newlines or other special chars. We use `config:export --format=json` instead.
-        system = app_name is None
-        params = ["--format", "json"]
-        if merged:
-            params.append("--merged")
-        params.append("--global" if system else app_name)
-        stdout = self._evaluate("export", params=params)
-        data = json.loads(stdout)
+        data = self.dokku.filesystem.config(app_name, merged=merged) if self.dokku.filesystem is not None else None
+        if data is None:
+            system = app_name is None
+            params = ["--format", "json"]
+            if merged:
+                params.append("--merged")
+            params.append("--global" if system else app_name)
+            stdout = self._evaluate("export", params=params)
+            data = json.loads(stdout)
         if hide_internal:
             data = {key: value for key, value in data.items() if not key.startswith("DOKKU_")}
         if as_dict:
@@ -136,7 +139,10 @@ class ConfigPlugin(DokkuPlugin):
     ) -> Union[List[str], List[Command]]:
         return [self.set_many(configs=[obj], restart=False, execute=execute)]
 
-    def object_create_many(self, objs: List[Config], execute: bool = True) -> Union[Iterator[str], Iterator[Command]]:
+    def object_create_many(
+        self, objs: List[Config], execute: bool = True, skip_system: bool = False
+    ) -> Union[Iterator[str], Iterator[Command]]:
+        # `skip_system` is ignored since global configs are represented by specific objects (`app_name=None`)
         objs.sort(key=get_app_name)
         groups = groupby(objs, key=get_app_name)
         for app_name, configs in groups:
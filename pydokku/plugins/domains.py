@@ -68,6 +68,10 @@ class DomainsPlugin(DokkuPlugin):
     def list(self, app_name: Union[str, None] = None) -> List[Domain]:
         # Dokku won't return error in this `report` command, but `check=False` is used in all `:report/list` because of
         # this inconsistent behavior <https://github.com/dokku/dokku/issues/7454>
+        if self.dokku.filesystem is not None:
+            domains = self.dokku.filesystem.domains(app_name)
+            if domains is not None:
+                return domains
         system = app_name is None
         if system:
             stdout_global = self._evaluate("report", ["--global"], check=False, execute=True)
@@ -2,9 +2,10 @@ import netrc
 import tempfile
 from functools import lru_cache
 from pathlib import Path
-from typing import List, Tuple, Union
+from typing import BinaryIO, Iterable, List, Tuple, Union
 
 from ..models import App, Auth, Command, Git, SSHKey
+from ..ssh import key_fingerprints
 from ..utils import clean_stderr, get_stdout_rows_parser, parse_bool, parse_timestamp
 from .base import DokkuPlugin
 
@@ -32,10 +33,10 @@ class GitPlugin(DokkuPlugin):
     Extra features:
     - `host_list` method: read known hosts file (which is populated by `git:allow-host` subcommand)
     - `auth_list` method: read netrc file (which is populated by `git:auth` subcommand)
+    - `load_image` method: the image data is streamed from a file path, binary file object or iterable of bytes
 
     Subcommands NOT implemented:
     - `git:status`: it always return "fatal: this operation must be run in a work tree", so not useful
-    - `git:load-image`: huge stdin input is currently not a priority
     - `git:set`: was split in `set()` and `unset()` methods
     """
 
@@ -43,6 +44,7 @@ class GitPlugin(DokkuPlugin):
     object_classes = (SSHKey, Auth, Git)
     requires = ("apps",)
     requires_extra_commands = True
+    read_only_operations = ("report", "public-key")
 
     @lru_cache
     def _get_rows_parser(self):
@@ -58,17 +60,14 @@ class GitPlugin(DokkuPlugin):
             },
         )
 
-    def list(self, app_name: Union[str, None] = None) -> Union[List[Git], Git]:
+    def _list_command(self, app_name: Union[str, None] = None) -> Command:
         # Dokku won't return error in this `report` command, but `check=False` is used in all `:report/list` because of
         # this inconsistent behavior <https://github.com/dokku/dokku/issues/7454>
         system = app_name is None
-        _, stdout, stderr = self._evaluate(
-            "report",
-            params=[] if system else [app_name],
-            check=False,
-            full_return=True,
-            execute=True,
-        )
+        return self._evaluate("report", params=[] if system else [app_name], check=False, execute=False)
+
+    def _list_parse(self, result: Tuple[int, str, str], app_name: Union[str, None] = None) -> List[Git]:
+        _, stdout, stderr = result
         stderr = clean_stderr(stderr)
         if "You haven't deployed any applications yet" in stderr:
             return []
@@ -77,6 +76,9 @@ class GitPlugin(DokkuPlugin):
         rows_parser = self._get_rows_parser()
         return [Git(**row) for row in rows_parser(stdout)]
 
+    def list(self, app_name: Union[str, None] = None) -> Union[List[Git], Git]:
+        return self._list_parse(self._execute(self._list_command(app_name)), app_name)
+
     def from_archive(
         self,
         app_name: str,
@@ -115,6 +117,35 @@ class GitPlugin(DokkuPlugin):
             raise ValueError("`git_username` is required for using `git_email`")
         return self._evaluate("from-image", params=params, execute=execute)
 
+    def load_image(
+        self,
+        app_name: str,
+        image: str,
+        data: Union[str, Path, BinaryIO, Iterable[bytes]],
+        build_path: Union[str, Path, None] = None,
+        git_username: Union[str, None] = None,
+        git_email: Union[str, None] = None,
+        execute: bool = True,
+    ) -> Union[str, Command]:
+        """Deploy an image from a `docker image save` tarball (`data`), which is streamed to the command's stdin
+
+        `data` can be a file path (`str` or `Path`, opened only when executing), a binary file object or an iterable of
+        bytes chunks, so multi-GB images are never entirely loaded in memory.
+        """
+        params = []
+        if build_path is not None:
+            params.extend(["--build-dir", str(Path(build_path).absolute())])
+        params.extend([app_name, image])
+        if git_username is not None:
+            params.append(git_username)
+            if git_email is not None:
+                params.append(git_email)
+        elif git_email is not None:
+            raise ValueError("`git_username` is required for using `git_email`")
+        if isinstance(data, str):
+            data = Path(data)
+        return self._evaluate("load-image", params=params, stdin=data, execute=execute)
+
     def initialize(self, app_name: str, execute: bool = True) -> Union[str, Command]:
         return self._evaluate("initialize", params=[app_name], execute=execute)
 
@@ -167,9 +198,9 @@ class GitPlugin(DokkuPlugin):
             if not line or line.startswith("#"):
                 continue
             hostname, public_key = line.split(" ", maxsplit=1)
-            key = SSHKey(name=hostname, public_key=public_key)
-            key.calculate_fingerprint()
-            result.append(key)
+            result.append(SSHKey(name=hostname, public_key=public_key))
+        for key, fingerprint in zip(result, key_fingerprints([key.public_key for key in result])):
+            key.fingerprint = fingerprint.split()[1]
         return result
 
     def _parse_generate_deploy_key(self, stdout: str) -> Tuple[Union[str, None], Union[str, None]]:
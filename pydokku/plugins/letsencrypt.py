@@ -17,7 +17,8 @@ class LetsEncryptPlugin(DokkuPlugin):
     - In `list(): absolute datetime of renewal is calculated based on expirity date and time before expires, so we always
       have absolute datetimes and don't need to know when the `:list` command ran.
     - The `list()` method, after running `:list` will also try to read plugin config (to get properties set for each
-      app) and run `:active` to check if is enabled (if the user has the permission to do so).
+      app) and run `:active` to check if is enabled (if the user has the permission to do so). Options and `:active`
+      results for all the apps are got in one round trip each.
     - `letsencrypt:set`: was split in `set()` and `unset()` methods
     """
 
@@ -25,6 +26,7 @@ class LetsEncryptPlugin(DokkuPlugin):
     object_classes = (LetsEncrypt,)
     requires = ("apps", "domains", "proxy", "nginx")
     requires_extra_commands = True
+    read_only_operations = ("report", "list", "active")
 
     def _parse_list(self, stdout: str) -> List[Dict]:
         lines = stdout.strip().splitlines()
@@ -52,8 +54,7 @@ class LetsEncryptPlugin(DokkuPlugin):
     def disable(self, app_name: str, execute: bool = True) -> Union[str, Command]:
         return self._evaluate("disable", params=[app_name], execute=execute)
 
-    def active(self, app_name: str) -> bool:
-        _, stdout, stderr = self._evaluate("active", params=[app_name], check=False, full_return=True, execute=True)
+    def _parse_active(self, stdout: str, stderr: str) -> bool:
         stderr = clean_stderr(stderr)
         if "does not exist" in stderr:
             return []
@@ -61,6 +62,18 @@ class LetsEncryptPlugin(DokkuPlugin):
             raise RuntimeError(f"Error executing letsencrypt:active: {stderr}")
         return {"true": True, "false": False}[stdout.strip().lower()]
 
+    def active(self, app_name: str) -> bool:
+        _, stdout, stderr = self._evaluate("active", params=[app_name], check=False, full_return=True, execute=True)
+        return self._parse_active(stdout, stderr)
+
+    def active_many(self, apps_names: List[str]) -> Dict[str, bool]:
+        """Same as `active` for many apps, executing all the `letsencrypt:active` commands in one round trip"""
+        commands = [self._evaluate("active", params=[app_name], check=False, execute=False) for app_name in apps_names]
+        results = self.dokku.execute_many(commands)
+        return {
+            app_name: self._parse_active(stdout, stderr) for app_name, (_, stdout, stderr) in zip(apps_names, results)
+        }
+
     def cleanup(self, app_name: str, execute: bool = True) -> Union[str, Command]:
         return self._evaluate("cleanup", params=[app_name], execute=execute)
 
@@ -107,18 +120,22 @@ class LetsEncryptPlugin(DokkuPlugin):
         if apps_names is None or None in apps_names:
             # `dokku letsencrypt:list` won't list the global one, but it has options
             rows.insert(0, {"app_name": None, "expires_at": None, "renewals_at": None})
+        options = {}
+        if self.dokku.can_execute_regular_commands:  # Options for all the apps are read with only one command
+            options = self.dokku.plugin_apps_config(
+                plugin_name=self.plugin_name,
+                apps_names=[row["app_name"] if row["app_name"] is not None else "--global" for row in rows],
+            )
+        active = self.active_many([row["app_name"] for row in rows if row["app_name"] is not None])
         for row in rows:
             app_name = row["app_name"]
             if self.dokku.can_execute_regular_commands:
-                row["options"] = self.dokku.plugin_app_config(
-                    plugin_name=self.plugin_name,
-                    app_name=app_name if app_name is not None else "--global",
-                )
+                row["options"] = options[app_name if app_name is not None else "--global"]
             if app_name is None:
                 # If the plugin is enabled and we were able to run the `list` command, then global is enabled
                 row["enabled"] = True
             else:
-                row["enabled"] = self.active(app_name=app_name)
+                row["enabled"] = active[app_name]
         return [LetsEncrypt(**row) for row in rows]
 
     def list(self) -> List[LetsEncrypt]:
@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import List, Union
+from typing import List, Tuple, Union
 
 from ..models import App, Command, Maintenance
 from ..utils import get_stdout_rows_parser, parse_bool
@@ -31,13 +31,14 @@ class MaintenancePlugin(DokkuPlugin):
             },
         )
 
-    def list(self, app_name: Union[str, None] = None) -> List[Maintenance]:
+    def _list_command(self, app_name: Union[str, None] = None) -> Command:
         system = app_name is None
         # Dokku WILL return error in this `report` command, so `check=False` is used in all `:report/list` because of
         # this inconsistent behavior <https://github.com/dokku/dokku/issues/7454>
-        _, stdout, stderr = self._evaluate(
-            "report", params=[] if system else [app_name], check=False, full_return=True, execute=True
-        )
+        return self._evaluate("report", params=[] if system else [app_name], check=False, execute=False)
+
+    def _list_parse(self, result: Tuple[int, str, str], app_name: Union[str, None] = None) -> List[Maintenance]:
+        _, stdout, stderr = result
         if not stdout and "You haven't deployed any applications yet" in stderr:
             return []
         elif stderr:
@@ -45,6 +46,9 @@ class MaintenancePlugin(DokkuPlugin):
         rows_parser = self._get_rows_parser()
         return [Maintenance(**row) for row in rows_parser(stdout)]
 
+    def list(self, app_name: Union[str, None] = None) -> List[Maintenance]:
+        return self._list_parse(self._execute(self._list_command(app_name)), app_name)
+
     def enable(self, app_name: str, execute: bool = True) -> Union[str, Command]:
         return self._evaluate("enable", params=[app_name], execute=execute)
 
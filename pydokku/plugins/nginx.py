@@ -1,9 +1,10 @@
 import datetime
 from functools import lru_cache
-from typing import Any, List, Union
+from typing import Any, List, Tuple, Union
 
 from ..models import App, Command, Nginx
 from ..utils import (
+    StreamingProcess,
     dataclass_field_set,
     get_stdout_rows_parser,
     parse_bool,
@@ -22,6 +23,7 @@ class NginxPlugin(DokkuPlugin):
 
     Extra features:
     - `list()` will add a global object
+    - `access_logs()`/`error_logs()`: `stream=True` returns a `StreamingProcess` (combine with `tail=True` to follow)
     """
 
     name = subcommand = "nginx"
@@ -29,6 +31,7 @@ class NginxPlugin(DokkuPlugin):
     object_classes = (Nginx,)
     requires = ("apps", "domains", "ports", "proxy", "redirect")
     requires_extra_commands = False
+    read_only_operations = ("report", "show-config")
 
     @lru_cache
     def _get_rows_parser(self):
@@ -103,11 +106,14 @@ class NginxPlugin(DokkuPlugin):
             result.append(Nginx(**app_row))
         return result
 
-    def list(self, app_name: Union[str, None] = None) -> Union[str, Command]:
+    def _list_command(self, app_name: Union[str, None] = None) -> Command:
         # Dokku won't return error in this `report` command, but `check=False` is used in all `:report/list` because of
         # this inconsistent behavior <https://github.com/dokku/dokku/issues/7454>
         system = app_name is None
-        stdout = self._evaluate("report", params=[] if system else [app_name], check=False, execute=True)
+        return self._evaluate("report", params=[] if system else [app_name], check=False, execute=False)
+
+    def _list_parse(self, result: Tuple[int, str, str], app_name: Union[str, None] = None) -> List[Nginx]:
+        _, stdout, _ = result
         rows_parser = self._get_rows_parser()
         parsed_rows = rows_parser(stdout)
         result = []
@@ -115,11 +121,26 @@ class NginxPlugin(DokkuPlugin):
             result.extend(self._convert_rows(parsed_rows=[row], skip_system=index > 0))
         return result
 
-    def access_logs(self, app_name: str, execute: bool = True) -> Union[str, Command]:
-        return self._evaluate("access-logs", params=[app_name], execute=execute)
-
-    def error_logs(self, app_name: str, execute: bool = True) -> Union[str, Command]:
-        return self._evaluate("error-logs", params=[app_name], execute=execute)
+    def list(self, app_name: Union[str, None] = None) -> Union[str, Command]:
+        return self._list_parse(self._execute(self._list_command(app_name)), app_name)
+
+    def _logs(self, operation: str, app_name: str, tail: bool, stream: bool, execute: bool):
+        if tail and execute and not stream:
+            raise ValueError("`tail=True` requires `stream=True` (the command never finishes)")
+        params = [app_name] + (["-t"] if tail else [])
+        return self._evaluate(operation, params=params, execute=execute, stream=stream)
+
+    def access_logs(
+        self, app_name: str, tail: bool = False, stream: bool = False, execute: bool = True
+    ) -> Union[str, Command, StreamingProcess]:
+        """Get access logs (`stream=True` returns a `StreamingProcess`, so lines can be read as they're logged)"""
+        return self._logs("access-logs", app_name, tail=tail, stream=stream, execute=execute)
+
+    def error_logs(
+        self, app_name: str, tail: bool = False, stream: bool = False, execute: bool = True
+    ) -> Union[str, Command, StreamingProcess]:
+        """Get error logs (`stream=True` returns a `StreamingProcess`, so lines can be read as they're logged)"""
+        return self._logs("error-logs", app_name, tail=tail, stream=stream, execute=execute)
 
     def set(self, app_name: Union[str, None], key: str, value: Any, execute: bool = True) -> Union[str, Command]:
         system = app_name is None
@@ -66,9 +66,19 @@ class PluginPlugin(DokkuPlugin):
     def list(self) -> List[Plugin]:
         stdout = self._evaluate("list", execute=True)
         plugins = self._parse_list(stdout)
+        read_from_files = set()
+        if self.dokku.filesystem is not None:
+            for plugin in plugins:
+                git_files = None if plugin.is_core else self.dokku.filesystem.plugin_git_files(plugin.name)
+                if git_files is None:
+                    continue
+                head, config = git_files
+                plugin.git_reference = parse_git_head(head) if head else None
+                plugin.git_url = get_git_origin_url(config) if config else None
+                read_from_files.add(plugin.name)
         if self.dokku.can_execute_regular_commands:
             for plugin in plugins:
-                if plugin.is_core:
+                if plugin.is_core or plugin.name in read_from_files:
                     continue
                 cmd = Command(["cat", f"/var/lib/dokku/plugins/available/{plugin.name}/.git/HEAD"], check=False)
                 returncode_head, stdout_head, stderr_head = self.dokku._execute(cmd)
@@ -120,6 +120,12 @@ class PortsPlugin(DokkuPlugin):
                 result.extend(self._convert_rows([self._parse_old_row(stdout)], skip_system=True))
             return result
 
+    def check_result(self, command: Command, return_code: int, stdout: str, stderr: str):
+        # `ports:add` and `ports:set` exit with `0` when the ports are invalid
+        operation = command.command[1].split(":", maxsplit=1)[-1][len(self._operation_prefix) :]
+        if operation in ("add", "set") and "No port set" in stdout:
+            raise RuntimeError(f"Cannot {operation} port to app {command.command[2]}: {stdout}")
+
     def clear(self, app_name: str, execute: bool = True) -> Union[str, Command]:
         return self._evaluate(f"{self._operation_prefix}clear", params=[app_name], execute=execute)
 
@@ -133,11 +139,13 @@ class PortsPlugin(DokkuPlugin):
                     params.append(f"{port.scheme}:{port.host_port}:{port.container_port}")
                 else:
                     params.append(f"{port.scheme}:{port.host_port}")
-            app_result = self._evaluate(f"{self._operation_prefix}add", params=params, execute=execute)
-            if execute and "No port set" in app_result:
-                app_title = "global" if app_name is None else f"app {app_name}"
-                raise RuntimeError(f"Cannot add port to {app_title}: {app_result}")
-            result.append(app_result)
+            command = self._evaluate(f"{self._operation_prefix}add", params=params, execute=False)
+            if not execute:
+                result.append(command)
+                continue
+            return_code, stdout, stderr = self._execute(command)
+            self.check_result(command, return_code, stdout, stderr)
+            result.append(stdout)
         return result
 
     def set(self, ports: List[Port], execute: bool = True) -> Union[List[str], List[Command]]:
@@ -150,11 +158,13 @@ class PortsPlugin(DokkuPlugin):
                     params.append(f"{port.scheme}:{port.host_port}:{port.container_port}")
                 else:
                     params.append(f"{port.scheme}:{port.host_port}")
-            app_result = self._evaluate(f"{self._operation_prefix}set", params=params, execute=execute)
-            if execute and "No port set" in app_result:
-                app_title = "global" if app_name is None else f"app {app_name}"
-                raise RuntimeError(f"Cannot set port to {app_title}: {app_result}")
-            result.append(app_result)
+            command = self._evaluate(f"{self._operation_prefix}set", params=params, execute=False)
+            if not execute:
+                result.append(command)
+                continue
+            return_code, stdout, stderr = self._execute(command)
+            self.check_result(command, return_code, stdout, stderr)
+            result.append(stdout)
         return result
 
     def remove(self, ports: List[Port], execute: bool = True) -> Union[List[str], List[Command]]:
@@ -188,7 +198,10 @@ class PortsPlugin(DokkuPlugin):
             return []
         return self.set(ports=[obj], execute=execute)
 
-    def object_create_many(self, objs: List[Port], execute: bool = True) -> Union[Iterator[str], Iterator[Command]]:
+    def object_create_many(
+        self, objs: List[Port], execute: bool = True, skip_system: bool = False
+    ) -> Union[Iterator[str], Iterator[Command]]:
+        # `skip_system` is ignored since there's no way to set global port mapping
         filtered_objs = [obj for obj in objs if obj.app_name is not None]
         if filtered_objs:
             yield from self.set(ports=filtered_objs, execute=execute)
@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import List, Union
+from typing import List, Tuple, Union
 
 from ..models import App, Command, Proxy
 from ..utils import clean_stderr, get_stdout_rows_parser, parse_bool
@@ -30,14 +30,14 @@ class ProxyPlugin(DokkuPlugin):
             parsers={"enabled": parse_bool},
         )
 
-    def list(self, app_name: Union[str, None] = None) -> Union[List[Proxy]]:
-        """Get the list of proxy configs for each app. If `app_name` is `None`, the report includes all apps"""
+    def _list_command(self, app_name: Union[str, None] = None) -> Command:
         # Dokku WILL return error in this `report` command, so `check=False` is used in all `:report/list` because of
         # this inconsistent behavior <https://github.com/dokku/dokku/issues/7454>
         system = app_name is None
-        _, stdout, stderr = self._evaluate(
-            "report", params=[] if system else [app_name], check=False, full_return=True, execute=True
-        )
+        return self._evaluate("report", params=[] if system else [app_name], check=False, execute=False)
+
+    def _list_parse(self, result: Tuple[int, str, str], app_name: Union[str, None] = None) -> List[Proxy]:
+        _, stdout, stderr = result
         stderr = clean_stderr(stderr)
         if "You haven't deployed any applications yet" in stderr:
             return []
@@ -50,6 +50,10 @@ class ProxyPlugin(DokkuPlugin):
                 del row["port_map"]
         return [Proxy(**row) for row in parsed_rows]
 
+    def list(self, app_name: Union[str, None] = None) -> Union[List[Proxy]]:
+        """Get the list of proxy configs for each app. If `app_name` is `None`, the report includes all apps"""
+        return self._list_parse(self._execute(self._list_command(app_name)), app_name)
+
     def enable(self, app_name: str, execute: bool = True) -> Union[str, Command]:
         return self._evaluate("enable", params=[app_name], execute=execute)
 
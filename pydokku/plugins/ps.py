@@ -2,7 +2,7 @@ import json
 import re
 from collections import Counter
 from functools import lru_cache
-from typing import Dict, List, Union
+from typing import Dict, List, Tuple, Union
 
 from ..models import App, Command, Process, ProcessInfo
 from ..utils import clean_stderr, get_stdout_rows_parser, parse_bool, parse_path
@@ -26,6 +26,11 @@ class PsPlugin(DokkuPlugin):
     object_classes = (ProcessInfo,)
     requires = ("apps", "git")
     requires_extra_commands = False
+    read_only_operations = ("report", "inspect")
+
+    def _is_read_only(self, operation: Union[str, None], params: List[str]) -> bool:
+        # `ps:scale <app>` (without process types/quantities) only shows the current scale
+        return super()._is_read_only(operation, params) or (operation == "scale" and len(params) == 1)
 
     def inspect(self, app_name: str, execute: bool = True) -> List[dict]:
         result = self._evaluate("inspect", [app_name], execute=execute)
@@ -72,22 +77,14 @@ class PsPlugin(DokkuPlugin):
             result.append(ProcessInfo(**row))
         return result
 
-    def list(self, app_name: Union[str, None] = None) -> Union[List[ProcessInfo], ProcessInfo]:
-        """Get the list of processes. If `app_name` is `None`, the report includes all apps
-
-        WARNING: if the app is not deployed yet, it won't show the scale for each process type - in this case you can
-        get those numbers by executing `self.get_scale(app_name)`.
-        """
+    def _list_command(self, app_name: Union[str, None] = None) -> Command:
         # Dokku WILL return error in this `report` command, so `check=False` is used in all `:report/list` because of
         # this inconsistent behavior <https://github.com/dokku/dokku/issues/7454>
         system = app_name is None
-        _, stdout, stderr = self._evaluate(
-            "report",
-            params=[] if system else [app_name],
-            check=False,
-            full_return=True,
-            execute=True,
-        )
+        return self._evaluate("report", params=[] if system else [app_name], check=False, execute=False)
+
+    def _list_parse(self, result: Tuple[int, str, str], app_name: Union[str, None] = None) -> List[ProcessInfo]:
+        _, stdout, stderr = result
         stderr = clean_stderr(stderr)
         if "You haven't deployed any applications yet" in stderr:
             return []
@@ -97,6 +94,14 @@ class PsPlugin(DokkuPlugin):
         parsed_rows = rows_parser(stdout)
         return self._convert_rows(parsed_rows)
 
+    def list(self, app_name: Union[str, None] = None) -> Union[List[ProcessInfo], ProcessInfo]:
+        """Get the list of processes. If `app_name` is `None`, the report includes all apps
+
+        WARNING: if the app is not deployed yet, it won't show the scale for each process type - in this case you can
+        get those numbers by executing `self.get_scale(app_name)`.
+        """
+        return self._list_parse(self._execute(self._list_command(app_name)), app_name)
+
     def start(
         self, app_name: Union[str, None] = None, parallel: int = None, execute: bool = True
     ) -> Union[str, Command]:
@@ -186,6 +191,16 @@ class PsPlugin(DokkuPlugin):
             raise RuntimeError(f"Cannot get scale for app {repr(app_name)}: {clean_stderr(stderr)}")
         return self._parse_scale(stdout)
 
+    def get_scale_many(self, apps_names: List[str]) -> Dict[str, Dict[str, int]]:
+        """Same as `get_scale` for many apps, executing all the `ps:scale` commands in one round trip"""
+        commands = [self._evaluate("scale", params=[app_name], check=False, execute=False) for app_name in apps_names]
+        result = {}
+        for app_name, (return_code, stdout, stderr) in zip(apps_names, self.dokku.execute_many(commands)):
+            if return_code != 0 or stderr:
+                raise RuntimeError(f"Cannot get scale for app {repr(app_name)}: {clean_stderr(stderr)}")
+            result[app_name] = self._parse_scale(stdout)
+        return result
+
     def set_scale(
         self, app_name: str, process_counts: Dict[str, int], skip_deploy: bool = False, execute: bool = True
     ) -> Union[str, Command]:
@@ -199,11 +214,17 @@ class PsPlugin(DokkuPlugin):
 
     def object_list(self, apps: List[App], system: bool = True) -> List[ProcessInfo]:
         apps_names = [app.name for app in apps]
-        result = []
-        for app_name in apps_names:
-            process_info = self.list(app_name=app_name)[0]
-            if not process_info.processes:  # Probably app not deployed yet - get more info via `self.get_scale`
-                for proc_type, number in self.get_scale(app_name=app_name).items():
+        # One report for all the apps and one batch of `ps:scale` for the ones not deployed yet, no matter how many
+        # apps there are
+        reports = {process_info.app_name: process_info for process_info in self.list()} if apps_names else {}
+        result = [
+            reports[app_name] if app_name in reports else self.list(app_name=app_name)[0] for app_name in apps_names
+        ]
+        # Probably apps not deployed yet - get more info via `ps:scale`
+        scales = self.get_scale_many([process_info.app_name for process_info in result if not process_info.processes])
+        for process_info in result:
+            if process_info.app_name in scales:
+                for proc_type, number in scales[process_info.app_name].items():
                     for process_id in range(1, number + 1):
                         process_info.processes.append(
                             Process(
@@ -213,7 +234,6 @@ class PsPlugin(DokkuPlugin):
                                 container_id=None,
                             )
                         )
-            result.append(process_info)
         return result
 
     def object_create(
@@ -36,6 +36,10 @@ class RedirectPlugin(DokkuPlugin):
     def list(self, app_name: str) -> List[Redirect]:
         # Dokku won't return error in this "list" command, but `check=False` is used in all `:report/list` because of
         # this inconsistent behavior <https://github.com/dokku/dokku/issues/7454>
+        if self.dokku.filesystem is not None:
+            redirects = self.dokku.filesystem.redirects(app_name)
+            if redirects is not None:
+                return redirects
         _, stdout, stderr = self._evaluate(None, params=[app_name], check=False, full_return=True, execute=True)
         if "There are no redirects for" in stderr:
             return []
@@ -82,22 +82,20 @@ class SSHKeysPlugin(DokkuPlugin):
         """Add a SSH key to Dokku"""
         if key.public_key is None:
             raise ValueError("Cannot add an empty public key")
-        result = self._evaluate(
-            "add",
-            params=[key.name],
-            stdin=key.public_key + "\n",
-            sudo=True,
-            execute=execute,
-            check=False,
-            full_return=True,
+        command = self._evaluate(
+            "add", params=[key.name], stdin=key.public_key + "\n", sudo=True, execute=False, check=False
         )
         if not execute:
-            return result
-        _, stdout, stderr = result
-        if stderr:
-            raise ValueError(f"Cannot add SSH key: {clean_stderr(stderr)}")
+            return command
+        return_code, stdout, stderr = self._execute(command)
+        self.check_result(command, return_code, stdout, stderr)
         return stdout
 
+    def check_result(self, command: Command, return_code: int, stdout: str, stderr: str):
+        # `ssh-keys:add` is executed with `check=False`, so the errors are detected by `stderr`
+        if command.command[1] == "ssh-keys:add" and stderr:
+            raise ValueError(f"Cannot add SSH key: {clean_stderr(stderr)}")
+
     def remove(self, key: SSHKey, execute: bool = True) -> Union[str, Command]:
         # WARNING: Dokku won't throw an error if you try to delete an unexisting key
         if not key.name and not key.fingerprint:
@@ -43,15 +43,23 @@ class StoragePlugin(DokkuPlugin):
     def list(self, app_name: str) -> List[Storage]:
         # Dokku won't return error in this `list` command, but `check=False` is used in all `:report/list` because of
         # this inconsistent behavior <https://github.com/dokku/dokku/issues/7454>
-        stdout = self._evaluate("list", [app_name, "--format", "json"], check=False, execute=True)
-        result = [
-            Storage(app_name=app_name, host_path=item["host_path"], container_path=item["container_path"])
-            for item in json.loads(stdout)
-        ]
+        result = self.dokku.filesystem.storage(app_name) if self.dokku.filesystem is not None else None
+        if result is None:
+            stdout = self._evaluate("list", [app_name, "--format", "json"], check=False, execute=True)
+            result = [
+                Storage(app_name=app_name, host_path=item["host_path"], container_path=item["container_path"])
+                for item in json.loads(stdout)
+            ]
+        owners = None
+        if result and self.dokku.filesystem is not None:
+            owners = [self.dokku.filesystem.path_owner(storage.host_path) for storage in result]
         # XXX: if it's running over SSH and the user is `dokku`, we won't be able to execute `stat` to get permission
         # info
         # TODO: add a warning regarding this?
-        if result and self.dokku.can_execute_regular_commands:
+        if owners is not None and None not in owners:
+            for storage, (user_id, group_id) in zip(result, owners):
+                storage.user_id, storage.group_id = user_id, group_id
+        elif result and self.dokku.can_execute_regular_commands:
             if not self.dokku.via_ssh:
                 for storage in result:
                     stat = storage.host_path.stat()
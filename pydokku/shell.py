@@ -0,0 +1,228 @@
+import base64
+import secrets
+import shlex
+import subprocess
+import threading
+from typing import BinaryIO, Iterable, Iterator, List, Tuple, Union
+
+from .utils import check_result
+
+# The script prelude creates a private temporary directory (so each command's stdout/stderr can be captured
+# separately) and defines the function which writes one frame: a header line followed by stdout and stderr contents.
+SCRIPT_PRELUDE = """
+__pydokku_tmp=$(mktemp -d) || exit 1
+trap 'rm -rf "$__pydokku_tmp"' EXIT
+__pydokku_frame() {{
+  printf '%s %s %s %s %s\\n' '{marker}' "$1" "$2" "$(($(wc -c < "$3")))" "$(($(wc -c < "$4")))"
+  cat "$3" "$4"
+}}
+"""
+
+
+def frame_marker(token: str) -> str:
+    return f"@pydokku-{token}"
+
+
+def script_prelude(token: str) -> str:
+    return SCRIPT_PRELUDE.format(marker=frame_marker(token))
+
+
+def command_snippet(command: List[str], name: str, stdin: Union[str, None] = None, stop_on_error: bool = False) -> str:
+    """Shell code to run `command` and write its result as a frame (needs `script_prelude` to be executed before)
+
+    >>> print(command_snippet(["dokku", "apps:report"], name="0"))
+    dokku apps:report </dev/null >"$__pydokku_tmp/out" 2>"$__pydokku_tmp/err"; __pydokku_frame 0 $? "$__pydokku_tmp/out" "$__pydokku_tmp/err"
+    >>> print(command_snippet(["cat"], name="1", stdin="abc", stop_on_error=True))
+    printf '%s' YWJj | base64 -d | cat >"$__pydokku_tmp/out" 2>"$__pydokku_tmp/err"; __pydokku_rc=$?; __pydokku_frame 1 $__pydokku_rc "$__pydokku_tmp/out" "$__pydokku_tmp/err"; [ $__pydokku_rc -eq 0 ] || exit 0
+    """
+    cmd_txt = shlex.join(command)
+    if stdin is None:
+        run = f"{cmd_txt} </dev/null"
+    else:
+        encoded = base64.b64encode(stdin.encode("utf-8")).decode("ascii")
+        run = f"printf '%s' {encoded} | base64 -d | {cmd_txt}"
+    out, err = '"$__pydokku_tmp/out"', '"$__pydokku_tmp/err"'
+    if not stop_on_error:
+        return f"{run} >{out} 2>{err}; __pydokku_frame {name} $? {out} {err}"
+    return (
+        f"{run} >{out} 2>{err}; __pydokku_rc=$?; __pydokku_frame {name} $__pydokku_rc {out} {err}; "
+        "[ $__pydokku_rc -eq 0 ] || exit 0"
+    )
+
+
+def directory_files_script(token: str, base_path: str, names: List[str]) -> str:
+    """Script which writes a frame (named `<name>/<filename>`, as stdout) for each regular file in `base_path/<name>`
+
+    Hidden files are skipped (as `ls` does) and missing directories produce no frames.
+
+    >>> print("\\n".join(directory_files_script("t", "/config/letsencrypt", ["app1", "--global"]).splitlines()[-6:-4]))
+    for __pydokku_name in app1 --global; do
+      for __pydokku_path in /config/letsencrypt/"$__pydokku_name"/*; do
+    """
+    return script_prelude(token) + (
+        f"for __pydokku_name in {' '.join(shlex.quote(name) for name in names)}; do\n"
+        f'  for __pydokku_path in {shlex.quote(base_path)}/"$__pydokku_name"/*; do\n'
+        '    [ -f "$__pydokku_path" ] || continue\n'
+        '    __pydokku_frame "$__pydokku_name/${__pydokku_path##*/}" 0 "$__pydokku_path" /dev/null\n'
+        "  done\n"
+        "done\n"
+    )
+
+
+def read_frames(fobj: BinaryIO, token: str, errors: str = "strict") -> Iterator[Tuple[str, int, str, str]]:
+    """Read frames written by `__pydokku_frame` and yield `(name, return_code, stdout, stderr)` for each of them
+
+    Any line which is not a frame header is ignored (like messages a login shell may print before the script runs).
+    Frame sizes are in bytes, so `fobj` must have the exact bytes written by the script (not text converted back to
+    bytes). `errors` is used to decode stdout/stderr.
+    """
+    marker = frame_marker(token).encode("ascii")
+    while True:
+        line = fobj.readline()
+        if not line:
+            return
+        parts = line.split()
+        if len(parts) != 5 or parts[0] != marker:
+            continue
+        name, return_code, stdout_size, stderr_size = parts[1:]
+        stdout, stderr = fobj.read(int(stdout_size)), fobj.read(int(stderr_size))
+        yield name.decode("utf-8"), int(return_code), stdout.decode("utf-8", errors), stderr.decode("utf-8", errors)
+
+
+def execute_script(
+    prefix: List[str], commands: Iterable[Tuple[List[str], Union[str, None], bool]]
+) -> Iterator[Tuple[int, str, str]]:
+    """Run `(command, stdin, stop_on_error)` items as one shell script in a single process (one SSH round trip)
+
+    The results are yielded as soon as each frame is read. The script ends at the first failing command which has
+    `stop_on_error` set, so fewer results than commands may be yielded.
+    """
+    token = secrets.token_hex(8)
+    script = script_prelude(token) + "\n".join(
+        command_snippet(command, name=str(index), stdin=stdin, stop_on_error=stop_on_error)
+        for index, (command, stdin, stop_on_error) in enumerate(commands)
+    )
+    process = subprocess.Popen(
+        list(prefix) + ["sh"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+
+    def write():
+        try:
+            process.stdin.write(script.encode("utf-8") + b"\n")
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+
+    # Writing is done in another thread so the script's output won't block it while it's still being written
+    writer = threading.Thread(target=write, daemon=True)
+    writer.start()
+    try:
+        for _, return_code, stdout, stderr in read_frames(process.stdout, token):
+            yield return_code, stdout, stderr
+    finally:
+        writer.join()
+        process.stdout.close()
+        process.wait()
+
+
+class ShellSession:
+    """Keep one shell process open (locally or via SSH) and pipeline commands through it
+
+    Each command's stdin is sent base64-encoded inside the script and its stdout, stderr and exit code are read back as
+    a frame, so there's no need to spawn a new process (or to open a new SSH channel) for every command.
+    """
+
+    def __init__(self, prefix: Union[List[str], None] = None):
+        self.command = list(prefix or []) + ["sh"]
+        self._process = None
+        self._frames = None
+        self._token = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def _start(self):
+        self._token = secrets.token_hex(8)
+        self._process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self._frames = read_frames(self._process.stdout, self._token, errors="replace")
+        self._process.stdin.write(script_prelude(self._token).encode("utf-8"))
+        self._process.stdin.flush()
+
+    def _write(self, snippets: List[str]):
+        try:
+            for snippet in snippets:
+                self._process.stdin.write(snippet.encode("utf-8") + b"\n")
+            self._process.stdin.flush()
+        except BrokenPipeError:  # The shell died - the error is raised when reading the frames
+            pass
+
+    def execute_many(
+        self, commands: Iterable[Tuple[List[str], Union[str, None]]]
+    ) -> List[Tuple[int, str, str]]:
+        """Execute a sequence of `(command, stdin)` pairs and return `(return_code, stdout, stderr)` for each one
+
+        All the commands are written to the shell while the results are read, so they're executed without waiting for
+        a round trip between them.
+        """
+        commands = list(commands)
+        snippets = [
+            command_snippet(command, name=str(index), stdin=stdin) for index, (command, stdin) in enumerate(commands)
+        ]
+        with self._lock:
+            if not self.running:
+                self._start()
+            # Writing is done in another thread so big outputs won't fill the stdout pipe and block the shell while
+            # we're still writing the script
+            writer = threading.Thread(target=self._write, args=(snippets,), daemon=True)
+            writer.start()
+            results = []
+            try:
+                for _ in commands:
+                    frame = next(self._frames, None)
+                    if frame is None:
+                        raise RuntimeError(f"Shell session {self.command} terminated unexpectedly")
+                    _, return_code, stdout, stderr = frame
+                    results.append((return_code, stdout, stderr))
+            except BaseException:  # The frames can't be read anymore, so a new shell is started for the next commands
+                self._process.kill()  # So the writer won't be blocked
+                writer.join()
+                self._stop()
+                raise
+            writer.join()
+        return results
+
+    def execute(
+        self, command: List[str], stdin: Union[str, None] = None, check: bool = True
+    ) -> Tuple[int, str, str]:
+        result, stdout, stderr = self.execute_many([(command, stdin)])[0]
+        if check:
+            check_result(command, result, stdout, stderr)
+        return result, stdout, stderr
+
+    def _stop(self):
+        if self._process is not None:
+            try:
+                self._process.stdin.close()
+            except BrokenPipeError:
+                pass
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+            self._process.stdout.close()
+        self._process = self._frames = self._token = None
+
+    def close(self):
+        with self._lock:
+            self._stop()
@@ -0,0 +1,125 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Union
+
+from .instrumentation import CommandEvent
+
+STAGES_TRACK = "stages"
+
+
+class TraceRecorder:
+    """Record spans as Chrome trace events (open the saved file in <https://ui.perfetto.dev> or `chrome://tracing`)
+
+    Each thread is a track on the timeline, so concurrent plugins/commands are shown side by side. Spans which have a
+    `stage` argument are also summarized in one span per stage (in a separate track) by `save`.
+    """
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self._start = time.perf_counter()
+        self._events: List[Dict] = []
+        self._tracks: Dict[Union[int, str], int] = {}
+        self._lock = threading.Lock()
+
+    def _track(self, key: Union[int, str]) -> int:
+        if key not in self._tracks:
+            self._tracks[key] = len(self._tracks) + 1
+        return self._tracks[key]
+
+    def add_span(
+        self,
+        name: str,
+        category: str,
+        started_at: float,
+        finished_at: float,
+        args: Union[Dict, None] = None,
+        track: Union[int, str, None] = None,
+    ):
+        """Add a span (`started_at`/`finished_at` are `time.perf_counter()` values, `track` defaults to the thread)"""
+        with self._lock:
+            self._events.append(
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": round((started_at - self._start) * 1_000_000, 3),
+                    "dur": round((finished_at - started_at) * 1_000_000, 3),
+                    "pid": self.pid,
+                    "tid": self._track(track if track is not None else threading.get_ident()),
+                    "args": args or {},
+                }
+            )
+
+    @contextmanager
+    def span(self, name: str, category: str, **args):
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, category, started_at, time.perf_counter(), args=args)
+
+    def command_hook(self, event: CommandEvent):
+        """`Dokku.on_command_end` hook which adds a span for each command executed
+
+        Only the subcommand and the app name are recorded (not the parameters, which may have secrets like in
+        `config:set`), so trace files can be shared.
+        """
+        self.add_span(
+            event.subcommand,
+            "command",
+            event.started_at,
+            event.finished_at,
+            args={
+                "app_name": event.app_name,
+                "return_code": event.return_code,
+                "stdout_bytes": event.stdout_bytes,
+                "stderr_bytes": event.stderr_bytes,
+            },
+        )
+
+    def _stage_events(self) -> List[Dict]:
+        stages = {}
+        for event in self._events:
+            stage = event["args"].get("stage")
+            if stage is None:
+                continue
+            start, end = event["ts"], event["ts"] + event["dur"]
+            current = stages.get(stage, (start, end))
+            stages[stage] = (min(current[0], start), max(current[1], end))
+        return [
+            {
+                "name": f"stage {stage}",
+                "cat": "stage",
+                "ph": "X",
+                "ts": start,
+                "dur": round(end - start, 3),
+                "pid": self.pid,
+                "tid": self._track(STAGES_TRACK),
+                "args": {"stage": stage},
+            }
+            for stage, (start, end) in sorted(stages.items())
+        ]
+
+    def events(self) -> List[Dict]:
+        with self._lock:
+            events = self._events + self._stage_events()
+            metadata = [
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": self.pid,
+                    "tid": tid,
+                    "args": {"name": key if isinstance(key, str) else f"worker {tid}"},
+                }
+                for key, tid in self._tracks.items()
+            ]
+        return metadata + sorted(events, key=lambda event: event["ts"])
+
+    def save(self, filename: Union[Path, str]):
+        filename = Path(filename)
+        filename.parent.mkdir(parents=True, exist_ok=True)
+        filename.write_text(json.dumps({"traceEvents": self.events(), "displayTimeUnit": "ms"}))
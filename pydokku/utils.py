@@ -1,11 +1,20 @@
 import datetime
+import io
+import os
 import re
 import subprocess
+import tempfile
+import threading
 from dataclasses import fields
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Tuple, Union
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Tuple, Union
 
+# A command's stdin: text, bytes, a file path (opened only when the command is executed), a binary file object or an
+# iterable of bytes chunks. All but text and bytes are streamed to the process, so they're never entirely in memory.
+Stdin = Union[str, bytes, Path, BinaryIO, Iterable[bytes], None]
+STDIN_CHUNK_SIZE = 65536
+DEFAULT_SPOOL_MAX_MEMORY = 8 * 1024 * 1024  # Bytes of stdout kept in memory before spilling to disk
 REGEXP_DOKKU_HEADER = re.compile(r"^\s*=====> ", flags=re.MULTILINE)
 REGEXP_ISO_FORMAT = re.compile(r"([0-9]{4}-[0-9]{2}-[0-9]{2})[ T]([0-9]{2}:[0-9]{2}:[0-9]{2})(\.[0-9]+)?(.*)?")
 
@@ -202,7 +211,16 @@ def get_stdout_rows_parser(
     separator: str = "_",
     remove_prefix=None,
 ) -> Callable:
-    """Returns a function that parses stdout and returns a list of rows, already converted/parsed based on configs"""
+    """Returns a function that parses stdout (`str` or `bytes`) and returns a list of rows, already converted/parsed
+
+    The output is read in a single pass and the final key and parser of each raw key (like `Nginx hsts preload`) are
+    computed only the first time it's seen, since the same keys repeat for every app.
+
+    >>> parsers = {"locked": parse_bool}
+    >>> parser = get_stdout_rows_parser(normalize_keys=True, remove_prefix="app_", discards=["dir"], parsers=parsers)
+    >>> parser(b"=====> myapp app information\\n  App dir: /home/dokku/myapp\\n  App locked: false\\n  App owner:\\n")
+    [{'locked': False, 'app_name': 'myapp', 'owner': None}]
+    """
 
     known_output_fields = []
     if renames is not None:
@@ -214,40 +232,72 @@ def get_stdout_rows_parser(
             if field_name not in known_output_fields:
                 known_output_fields.append(field_name)
     base_row = {key: None for key in known_output_fields}
-
-    def func(stdout: str) -> List[dict]:
+    app_name_key = "app_name" if renames is None else renames.get("app_name", "app_name")
+    discards = frozenset(discards or ())
+    renames = renames or {}
+    parsers = parsers or {}
+    # Raw key -> (final key, parser) - final key is `None` if discarded
+    compiled_keys: Dict[str, Tuple[Union[str, None], Union[Callable[[str], Any], None]]] = {}
+
+    def compile_key(raw_key: str) -> Tuple[Union[str, None], Union[Callable[[str], Any], None]]:
+        key = raw_key
+        if normalize_keys:
+            key = key.lower().replace(" ", separator)
+        if remove_prefix is not None and key.startswith(remove_prefix):
+            key = key[len(remove_prefix) :]
+        key = renames.get(key, key)
+        compiled = (None, None) if key in discards else (key, parsers.get(key))
+        compiled_keys[raw_key] = compiled
+        return compiled
+
+    def func(stdout: Union[str, bytes]) -> List[dict]:
+        if not isinstance(stdout, str):
+            stdout = bytes(stdout).decode("utf-8")
         result = []
-        for row_text in REGEXP_DOKKU_HEADER.split(stdout.strip())[1:]:
-            lines = row_text.strip().splitlines()
-            row_app_name, _ = lines[0].split(maxsplit=1)
-            app_name_key = "app_name" if renames is None else renames.get("app_name", "app_name")
-            row = base_row.copy()
-            row[app_name_key] = row_app_name
-            for line in lines[1:]:
-                line = line.strip()
-                stop = line.find(":")
-                key, value = line[:stop], line[stop + 1 :]
-                if normalize_keys:
-                    key = key.lower().replace(" ", separator)
-                if remove_prefix is not None and key.startswith(remove_prefix):
-                    key = key[len(remove_prefix) :]
-                if renames is not None and key in renames:
-                    key = renames[key]
-                if discards is not None and key in discards:
-                    continue
-                value = value.strip()
-                if parsers is not None and key in parsers:
-                    value = parsers[key](value)
-                elif not value:
-                    value = None
-                row[key] = value
-            result.append(row)
+        row = None
+        for line in stdout.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            elif line.startswith("=====> "):
+                row = base_row.copy()
+                row[app_name_key] = line[7:].split(maxsplit=1)[0]
+                result.append(row)
+                continue
+            elif row is None:  # Anything before the first header is ignored
+                continue
+            stop = line.find(":")
+            raw_key = line[:stop]
+            key, parser = compiled_keys.get(raw_key) or compile_key(raw_key)
+            if key is None:
+                continue
+            value = line[stop + 1 :].strip()
+            if parser is not None:
+                value = parser(value)
+            elif not value:
+                value = None
+            row[key] = value
         return result
 
     return func
 
 
-def execute_command(command: List[str], stdin: Union[str, None] = None, check: bool = True) -> Tuple[int, str, str]:
+def check_result(command: List[str], result: int, stdout: str, stderr: str) -> None:
+    """Raise `RuntimeError` if the command's exit code is not zero"""
+    if result != 0:
+        raise RuntimeError(
+            f"Command {command} exited with status {result} (stdout: {repr(stdout)}, stderr: {repr(stderr)})"
+        )
+
+
+def execute_command(command: List[str], stdin: Stdin = None, check: bool = True) -> Tuple[int, str, str]:
+    if not is_text_stdin(stdin):  # Binary data is streamed to the process in chunks
+        process = StreamingProcess(command=command, stdin=stdin, check=False)
+        stdout = b"".join(process.chunks()).decode("utf-8")
+        result, stderr = process.return_code, process.stderr
+        if check:
+            check_result(command, result, stdout, stderr)
+        return result, stdout, stderr
     process = subprocess.Popen(
         command,
         stdin=subprocess.PIPE,
@@ -257,13 +307,213 @@ def execute_command(command: List[str], stdin: Union[str, None] = None, check: b
     )
     stdout, stderr = process.communicate(input=stdin)
     result = process.returncode
-    if check and result != 0:
-        raise RuntimeError(
-            f"Command {command} exited with status {result} (stdout: {repr(stdout)}, stderr: {repr(stderr)})"
-        )
+    if check:
+        check_result(command, result, stdout, stderr)
     return result, stdout, stderr
 
 
+def is_text_stdin(stdin: Stdin) -> bool:
+    """Check whether `stdin` is text (or no stdin), which can be embedded in scripts and printed"""
+    return stdin is None or isinstance(stdin, str)
+
+
+def stdin_file(stdin: Stdin) -> Tuple[Union[BinaryIO, None], bool]:
+    """Return `(file, must_close)` if `stdin` can be read directly by the process (without copying it in Python)"""
+    if isinstance(stdin, Path):
+        return open(stdin, mode="rb"), True
+    elif hasattr(stdin, "fileno"):
+        try:
+            stdin.fileno()
+        except (OSError, ValueError, io.UnsupportedOperation):
+            return None, False
+        try:  # Make the OS file position match the current position (buffered objects may have read ahead)
+            os.lseek(stdin.fileno(), stdin.tell(), os.SEEK_SET)
+        except (OSError, ValueError, io.UnsupportedOperation):
+            pass
+        return stdin, False
+    return None, False
+
+
+def iter_stdin(stdin: Stdin, chunk_size: int = STDIN_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield `stdin` contents as bytes chunks
+
+    >>> list(iter_stdin("ção"))
+    [b'\\xc3\\xa7\\xc3\\xa3o']
+    >>> list(iter_stdin(io.BytesIO(b"abcde"), chunk_size=2))
+    [b'ab', b'cd', b'e']
+    >>> list(iter_stdin(iter([b"a", b"b"])))
+    [b'a', b'b']
+    """
+    if stdin is None:
+        return
+    elif isinstance(stdin, str):
+        yield stdin.encode("utf-8")
+    elif isinstance(stdin, (bytes, bytearray, memoryview)):
+        yield bytes(stdin)
+    elif isinstance(stdin, Path):
+        with open(stdin, mode="rb") as fobj:
+            yield from iter(lambda: fobj.read(chunk_size), b"")
+    elif hasattr(stdin, "read"):
+        yield from iter(lambda: stdin.read(chunk_size), b"")
+    else:
+        yield from stdin
+
+
+class StreamingProcess:
+    """Execute a command and read its stdout as it's produced, instead of waiting for the command to finish
+
+    Iterating over the object yields stdout lines (use `chunks` for raw bytes). stderr is collected in a background
+    thread and `return_code` is available after the iteration ends (or after `wait`, which discards the stdout not
+    read yet). If `check` is `True`, a `RuntimeError` is raised at the end of the iteration when the command fails
+    (except if it was cancelled).
+    `on_exit(process)` is called once, after the process finishes. Use as a context manager so the process is
+    cancelled if the iteration is not finished:
+
+        with execute_command_stream(["tail", "-f", "/var/log/syslog"]) as process:
+            for line in process:
+                if "error" in line:
+                    break
+    """
+
+    def __init__(
+        self,
+        command: List[str],
+        stdin: Stdin = None,
+        check: bool = True,
+        on_exit: Union[Callable[["StreamingProcess"], None], None] = None,
+    ):
+        self.command = command
+        self.check = check
+        self.on_exit = on_exit
+        self.cancelled = False
+        self.return_code = None
+        self.stdout_bytes = 0
+        self._stderr = []
+        self._lock = threading.Lock()
+        input_file, must_close = stdin_file(stdin)
+        if input_file is None:
+            input_file = subprocess.PIPE if stdin is not None else subprocess.DEVNULL
+        try:
+            self._process = subprocess.Popen(
+                command,
+                stdin=input_file,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+        finally:
+            if must_close:  # The child process has its own copy of the file descriptor
+                input_file.close()
+        self._threads = [threading.Thread(target=self._read_stderr, daemon=True)]
+        if input_file is subprocess.PIPE:
+            self._threads.append(threading.Thread(target=self._write_stdin, args=(stdin,), daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def _write_stdin(self, stdin: Stdin):
+        try:
+            for chunk in iter_stdin(stdin):
+                self._process.stdin.write(chunk)
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+
+    def _read_stderr(self):
+        for data in iter(lambda: self._process.stderr.read1(65536), b""):
+            self._stderr.append(data)
+
+    @property
+    def stderr(self) -> str:
+        return b"".join(self._stderr).decode("utf-8", errors="replace")
+
+    def chunks(self, size: int = 65536) -> Iterator[bytes]:
+        """Yield stdout data as it arrives (each chunk has at most `size` bytes)"""
+        for data in iter(lambda: self._process.stdout.read1(size), b""):
+            self.stdout_bytes += len(data)
+            yield data
+        self._process.stdout.close()
+        self.wait()
+
+    def __iter__(self) -> Iterator[str]:
+        for line in self._process.stdout:
+            self.stdout_bytes += len(line)
+            yield line.decode("utf-8", errors="replace")
+        self._process.stdout.close()
+        self.wait()
+
+    def wait(self) -> int:
+        """Wait for the process to finish and return its exit code (raise `RuntimeError` if `check` and it failed)
+
+        stdout not read yet is discarded (otherwise a process with a big output would be blocked writing to the pipe).
+        """
+        with self._lock:  # `cancel` may be called from another thread
+            if self.return_code is None:
+                if not self._process.stdout.closed:
+                    for data in iter(lambda: self._process.stdout.read1(65536), b""):
+                        self.stdout_bytes += len(data)
+                self._process.wait()
+                for thread in self._threads:
+                    thread.join()
+                self._process.stderr.close()
+                self.return_code = self._process.returncode
+                if self.on_exit is not None:
+                    self.on_exit(self)
+        if self.check and not self.cancelled:
+            check_result(self.command, self.return_code, f"<{self.stdout_bytes} bytes>", self.stderr)
+        return self.return_code
+
+    @property
+    def running(self) -> bool:
+        return self._process.poll() is None
+
+    def cancel(self):
+        """Terminate the process (if still running) - the iteration ends and no error is raised by `check`"""
+        self.cancelled = True
+        if self.running:
+            self._process.terminate()
+        self.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        if self.return_code is None:
+            self.cancel()
+        self._process.stdout.close()
+
+
+def execute_command_stream(command: List[str], stdin: Stdin = None, check: bool = True) -> StreamingProcess:
+    return StreamingProcess(command=command, stdin=stdin, check=check)
+
+
+def spool_output(process: StreamingProcess, max_memory: int = DEFAULT_SPOOL_MAX_MEMORY) -> Tuple[int, BinaryIO, str]:
+    """Consume a `StreamingProcess` and return `(return_code, stdout_file, stderr)`
+
+    stdout is kept in memory up to `max_memory` bytes and spilled to a temporary file after that, so the memory usage
+    is bounded for any output size. `stdout_file` is a binary file-like object positioned at the beginning and the
+    caller must close it. If the process fails and has `check` set, the file is closed and `RuntimeError` is raised.
+    """
+    output = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    try:
+        for chunk in process.chunks():
+            output.write(chunk)
+    except BaseException:
+        output.close()
+        process.cancel()
+        raise
+    output.seek(0)
+    return process.return_code, output, process.stderr
+
+
+def execute_command_spooled(
+    command: List[str],
+    stdin: Stdin = None,
+    check: bool = True,
+    max_memory: int = DEFAULT_SPOOL_MAX_MEMORY,
+) -> Tuple[int, BinaryIO, str]:
+    """Same as `execute_command`, but stdout is a file-like object which spills to disk (see `spool_output`)"""
+    return spool_output(StreamingProcess(command=command, stdin=stdin, check=check), max_memory=max_memory)
+
+
 def human_readable_size(size, separator=" ", divider=1024):
     """
     >>> human_readable_size(100)
@@ -0,0 +1,111 @@
+"""Micro-benchmark for `utils.get_stdout_rows_parser` using a synthetic `nginx:report` output
+
+Usage (from the repository root): `python -m scripts.benchmark_report_parser [--apps 2000] [--repeat 5]`
+"""
+
+import argparse
+import time
+
+from pydokku import Dokku
+
+# One app in `dokku nginx:report` (Dokku 0.35) - some values are changed by the app name
+APP_REPORT = """=====> {app_name} nginx information
+       Nginx access log format:
+       Nginx computed access log format:
+       Nginx global access log format:
+       Nginx access log path:
+       Nginx computed access log path: /var/log/nginx/{app_name}-access.log
+       Nginx global access log path:  /var/log/nginx/{app_name}-access.log
+       Nginx bind address ipv4:
+       Nginx computed bind address ipv4:
+       Nginx global bind address ipv4:
+       Nginx bind address ipv6:
+       Nginx computed bind address ipv6: ::
+       Nginx global bind address ipv6: ::
+       Nginx client body timeout:
+       Nginx computed client body timeout: 60s
+       Nginx global client body timeout: 60s
+       Nginx client header timeout:
+       Nginx computed client header timeout: 60s
+       Nginx global client header timeout: 60s
+       Nginx client max body size:
+       Nginx computed client max body size: 1m
+       Nginx global client max body size: 1m
+       Nginx disable custom config:
+       Nginx computed disable custom config: false
+       Nginx global disable custom config: false
+       Nginx error log path:
+       Nginx computed error log path: /var/log/nginx/{app_name}-error.log
+       Nginx global error log path:   /var/log/nginx/{app_name}-error.log
+       Nginx hsts include subdomains:
+       Nginx computed hsts include subdomains: true
+       Nginx global hsts include subdomains: true
+       Nginx hsts max age:
+       Nginx computed hsts max age:   15724800
+       Nginx global hsts max age:     15724800
+       Nginx hsts preload:
+       Nginx computed hsts preload:   false
+       Nginx global hsts preload:     false
+       Nginx hsts:
+       Nginx computed hsts:           true
+       Nginx global hsts:             true
+       Nginx last visited at:         1736745546
+       Nginx keepalive timeout:
+       Nginx computed keepalive timeout: 75s
+       Nginx global keepalive timeout: 75s
+       Nginx lingering timeout:
+       Nginx computed lingering timeout: 5s
+       Nginx global lingering timeout: 5s
+       Nginx nginx conf sigil path:
+       Nginx computed nginx conf sigil path: nginx.conf.sigil
+       Nginx global nginx conf sigil path: nginx.conf.sigil
+       Nginx proxy buffer size:
+       Nginx computed proxy buffer size: 4k
+       Nginx global proxy buffer size: 4k
+       Nginx proxy buffering:
+       Nginx computed proxy buffering: on
+       Nginx global proxy buffering:  on
+       Nginx proxy buffers:
+       Nginx computed proxy buffers:  8 4k
+       Nginx global proxy buffers:    8 4k
+       Nginx proxy busy buffers size:
+       Nginx computed proxy busy buffers size: 8k
+       Nginx global proxy busy buffers size: 8k
+       Nginx proxy connect timeout:
+       Nginx computed proxy connect timeout: 60s
+       Nginx global proxy connect timeout: 60s
+       Nginx proxy read timeout:
+       Nginx computed proxy read timeout: 60s
+       Nginx global proxy read timeout: 60s
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--apps", type=int, default=2000, help="Number of apps in the synthetic report")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs (the best one is reported)")
+    args = parser.parse_args()
+
+    stdout = "".join(APP_REPORT.format(app_name=f"app-{number:05d}") for number in range(args.apps))
+    lines = stdout.count("\n")
+    inputs = {"str": stdout, "bytes": stdout.encode("utf-8")}
+    rows_parser = Dokku().nginx._get_rows_parser()
+    print(f"{args.apps} apps, {lines} lines ({len(inputs['bytes']) / 1024 / 1024:.1f} MiB)")
+    for input_type, data in inputs.items():
+        try:
+            rows_parser(data)
+        except (TypeError, AttributeError):
+            print(f"{input_type:>5}: not supported")
+            continue
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            rows = rows_parser(data)
+            timings.append(time.perf_counter() - start)
+        assert len(rows) == args.apps
+        best = min(timings)
+        print(f"{input_type:>5}: {best * 1000:.1f}ms (best of {args.repeat}), {best / lines * 1e9:.0f}ns/line")
+
+
+if __name__ == "__main__":
+    main()
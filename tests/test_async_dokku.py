@@ -0,0 +1,203 @@
+import asyncio
+import threading
+
+import pytest
+
+from pydokku import Dokku
+from pydokku.async_dokku import AsyncDokku, AsyncPlugin, execute_command_async
+from pydokku.cache import CommandCache
+from pydokku.models import Command, Config, Port
+
+
+def test_execute_command_async():
+    result = asyncio.run(execute_command_async(["cat"], stdin="some text ção"))
+    assert result == (0, "some text ção", "")
+    with pytest.raises(RuntimeError, match="exited with status 1"):
+        asyncio.run(execute_command_async(["false"]))
+    assert asyncio.run(execute_command_async(["false"], check=False)) == (1, "", "")
+
+
+def test_plugins_are_async():
+    dokku = AsyncDokku()
+    assert isinstance(dokku.apps, AsyncPlugin)
+    assert dokku.plugins["apps"] is dokku.apps
+    # Methods with `execute=False` don't execute anything, so the `Command` is returned by the coroutine
+    command = asyncio.run(dokku.config.set_many_dict("test-app", {"KEY": "value"}, execute=False))
+    assert command.command == ["dokku", "config:set", "--encoded", "--no-restart", "test-app", "KEY=dmFsdWU="]
+    assert dokku.apps.name == "apps"
+
+
+def test_call_replays_commands(temp_dir):
+    config_path = temp_dir / "config" / "letsencrypt"
+    for app_name in ("app-1", "app-2"):
+        (config_path / app_name).mkdir(parents=True)
+        (config_path / app_name / "email").write_text(f"{app_name}@example.net")
+        (config_path / app_name / "server").write_text("staging")
+    dokku = AsyncDokku(lib_root=temp_dir)
+    dokku.requires_sudo = False
+    executed = []
+    original_execute = dokku.execute
+
+    async def execute(command):
+        executed.append(command.command[0])
+        return await original_execute(command)
+
+    dokku.execute = execute
+
+    async def main():
+        return await asyncio.gather(
+            *[dokku.call(dokku.plugin_app_config, "letsencrypt", app_name) for app_name in ("app-1", "app-2")]
+        )
+
+    result = asyncio.run(main())
+    assert result == [
+        {"email": "app-1@example.net", "server": "staging"},
+        {"email": "app-2@example.net", "server": "staging"},
+    ]
+    # Each command is executed only once, even though the method is run again for each new command
+    assert sorted(executed) == ["cat", "cat", "cat", "cat", "ls", "ls"]
+
+
+def test_sync_execute_outside_call():
+    dokku = AsyncDokku()
+    assert dokku._execute(Command(["echo", "sync"])) == (0, "sync\n", "")
+
+
+def test_execute_command_async_binary_stdin(temp_dir):
+    data = b"\x00\xff" * 100_000
+    filename = temp_dir / "data.bin"
+    filename.write_bytes(data)
+
+    async def main():
+        results = []
+        for stdin in (data, filename, iter([data[:10], data[10:]])):
+            results.append(await execute_command_async(["wc", "-c"], stdin=stdin))
+        return results
+
+    assert asyncio.run(main()) == [(0, f"{len(data)}\n", "")] * 3
+
+
+def test_execute_many_inside_call():
+    dokku = AsyncDokku()
+    runs = []
+
+    def method():
+        runs.append(1)
+        return [stdout for _, stdout, _ in dokku.execute_many([Command(["echo", "a"]), Command(["echo", "b"])])]
+
+    assert asyncio.run(dokku.call(method)) == ["a\n", "b\n"]
+    assert len(runs) == 2  # The whole batch is awaited before running the method again
+    assert [result[1] for result in dokku.execute_many([Command(["echo", "c"])])] == ["c\n"]
+
+
+def test_letsencrypt_list(temp_dir):
+    config_path = temp_dir / "config" / "letsencrypt"
+    (config_path / "app-1").mkdir(parents=True)
+    (config_path / "app-1" / "email").write_text("app-1@example.net")
+    dokku = AsyncDokku(lib_root=temp_dir)
+    dokku.requires_sudo = False
+    list_stdout = (
+        "-----> App name           Certificate Expiry        Time before expiry        Time before renewal\n"
+        "app-1  2025-03-23 05:25:43       53d, 23h, 52m, 51s        23d, 23h, 52m, 51s\n"
+    )
+    executed = []
+    original_execute = dokku.execute
+
+    async def execute(command, binary=False):
+        executed.append(command.command[:2])
+        if command.command[:2] == ["dokku", "letsencrypt:list"]:
+            return 0, list_stdout, ""
+        elif command.command[:2] == ["dokku", "letsencrypt:active"]:
+            return 0, "true\n", ""
+        return await original_execute(command, binary=binary)
+
+    dokku.execute = execute
+    result = asyncio.run(dokku.letsencrypt.list())
+    assert [(obj.app_name, obj.enabled, obj.options) for obj in result] == [
+        (None, True, {}),
+        ("app-1", True, {"email": "app-1@example.net"}),
+    ]
+    # The options script (with the same token in each replay) is executed once, as the other commands
+    assert executed == [["dokku", "letsencrypt:list"], ["sh", "-c"], ["dokku", "letsencrypt:active"]]
+
+
+def test_execute_shares_cache():
+    cache = CommandCache()
+    dokku = AsyncDokku(cache=cache)
+    executed = []
+
+    async def execute_async(command, binary=False):
+        executed.append(command.command[1])
+        return 0, "{}", ""
+
+    dokku._execute_async = execute_async
+    read = Command(["dokku", "config:export", "--format", "json", "app1"], read_only=True)
+    write = Command(["dokku", "config:set", "app1", "A=1"], read_only=False)
+
+    async def main():
+        for command in (read, read, write, read):
+            await dokku.execute(command)
+
+    asyncio.run(main())
+    # The second read is cached and the write invalidates it
+    assert executed == ["config:export", "config:set", "config:export"]
+    assert cache.stats["hits"] == 1
+    # A synchronous instance using the same cache gets the result without executing `dokku`
+    assert Dokku(cache=cache)._execute(read) == (0, "{}", "")
+
+
+def test_list_and_set_await_commands():
+    dokku = AsyncDokku()
+    dokku._dokku_version = (0, 35, 15)
+    executed = []
+    outputs = {
+        "maintenance:report": "=====> app-1 maintenance information\n       Maintenance enabled:           true\n",
+        "ports:set": " !     No port set, setting ports via the detected values\n",
+    }
+
+    async def execute(command, binary=False):
+        executed.append(command.command)
+        return 0, outputs.get(command.command[1], "done\n"), ""
+
+    def run_again(*args, **kwargs):
+        raise AssertionError("The synchronous method must not be run")
+
+    dokku.execute = execute
+    dokku.maintenance._plugin.list = run_again
+    result = asyncio.run(dokku.maintenance.list("app-1"))
+    assert [(obj.app_name, obj.enabled) for obj in result] == [("app-1", True)]
+    assert executed == [["dokku", "maintenance:report", "app-1"]]
+
+    assert asyncio.run(dokku.nginx.set("app-1", "hsts", True)) == "done\n"
+    assert executed[-1] == ["dokku", "nginx:set", "app-1", "hsts", "true"]
+    command = asyncio.run(dokku.nginx.set("app-1", "hsts", True, execute=False))
+    assert command.command == executed[-1]
+    # The results are checked by the plugin, as when executed synchronously
+    with pytest.raises(RuntimeError, match="Cannot set port to app app-1"):
+        asyncio.run(dokku.ports.set([Port(app_name="app-1", scheme="http", host_port=80)]))
+
+    # Generator methods are consumed inside `call`, so their commands are awaited too
+    configs = [Config(app_name="app-1", key="A", value="1")]
+    assert asyncio.run(dokku.config.object_create_many(configs)) == ["done\n"]
+    assert executed[-1][:2] == ["dokku", "config:set"]
+
+
+def test_ssh_pool_acquired_in_thread(temp_dir, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(temp_dir))
+    dokku = AsyncDokku(ssh_host="example.net", ssh_user="root", interactive=True)
+    threads = []
+
+    def acquire():
+        threads.append(threading.get_ident())
+        dokku._ssh_pool.busy[0] += 1
+        return 0
+
+    async def execute_command_async(command, stdin=None, check=True, binary=False):
+        return 0, " ".join(command), ""
+
+    dokku._ssh_pool.acquire = acquire
+    monkeypatch.setattr("pydokku.async_dokku.execute_command_async", execute_command_async)
+    _, stdout, _ = asyncio.run(dokku.execute(Command(["dokku", "version"])))
+    assert stdout.endswith("root@example.net -- dokku version")
+    assert threads and threads[0] != threading.get_ident()  # Waiting for the master won't block the event loop
+    assert dokku._ssh_pool.busy == [0]
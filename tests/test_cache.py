@@ -0,0 +1,153 @@
+import pytest
+
+from pydokku import Dokku
+from pydokku.cache import CommandCache
+from pydokku.models import Command
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_command_cache_ttl():
+    clock = FakeClock()
+    cache = CommandCache(ttl=5, ttls={"ps:report": 1}, clock=clock)
+    cache.set("apps", "apps:list", (0, "apps", ""))
+    cache.set("ps", "ps:report", (0, "ps", ""))
+    assert cache.get("apps") == (0, "apps", "")
+    assert cache.get("ps") == (0, "ps", "")
+    clock.now = 2
+    assert cache.get("apps") == (0, "apps", "")
+    assert cache.get("ps") is None
+    clock.now = 5
+    assert cache.get("apps") is None
+    assert cache.get("other") is None
+    assert cache.stats == {"hits": 3, "misses": 3, "size": 0}
+
+
+def test_command_cache_lru():
+    cache = CommandCache(max_size=2)
+    cache.set("a", "apps:list", (0, "a", ""))
+    cache.set("b", "apps:list", (0, "b", ""))
+    assert cache.get("a") is not None  # `b` is now the least recently used
+    cache.set("c", "apps:list", (0, "c", ""))
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    with pytest.raises(ValueError):
+        CommandCache(max_size=0)
+
+
+def test_command_cache_is_cacheable():
+    cache = CommandCache(ttls={"domains:report": 0})
+    assert cache.is_cacheable(Command(["dokku", "apps:list"]))
+    assert cache.is_cacheable(Command(["dokku", "ps:report", "myapp"]))
+    assert not cache.is_cacheable(Command(["dokku", "domains:report", "myapp"]))
+    assert not cache.is_cacheable(Command(["dokku", "config:set", "myapp", "A=1"]))
+    assert not cache.is_cacheable(Command(["cat", "/etc/hosts"]))
+
+
+def test_dokku_cache():
+    cache = CommandCache()
+    assert Dokku(cache=cache).cache is cache  # An empty cache is falsy (it has `__len__`), but must be used
+    assert Dokku(cache=False).cache is None and Dokku().cache is None
+    executed = []
+
+    class FakeDokku(Dokku):
+        def _execute_uncached(self, command):
+            executed.append(command)
+            return (0, f"output {len(executed)}", "")
+
+    dokku = FakeDokku(cache=True)
+    assert dokku._execute(Command(["dokku", "apps:list"])) == (0, "output 1", "")
+    assert dokku._execute(Command(["dokku", "apps:list"])) == (0, "output 1", "")
+    assert dokku._execute(Command(["dokku", "ps:report", "app1"])) == (0, "output 2", "")
+    assert dokku._execute(Command(["dokku", "ps:report", "app2"])) == (0, "output 3", "")
+    assert dokku._execute(Command(["dokku", "ps:stop", "app1"])) == (0, "output 4", "")
+    assert dokku._execute(Command(["dokku", "ps:stop", "app1"])) == (0, "output 5", "")
+    # `ps:stop app1` invalidated `ps:report app1`
+    assert dokku.cache.stats == {"hits": 1, "misses": 3, "size": 2}
+    assert dokku._execute(Command(["dokku", "ps:report", "app1"])) == (0, "output 6", "")
+    assert dokku._execute(Command(["dokku", "ps:report", "app2"])) == (0, "output 3", "")
+    assert Dokku().cache is None
+
+
+def test_command_cache_invalidate():
+    cache = CommandCache()
+    reads = {
+        "config-app1": Command(["dokku", "config:export", "--format", "json", "app1"]),
+        "config-app2": Command(["dokku", "config:export", "--format", "json", "app2"]),
+        "config-global": Command(["dokku", "config:export", "--format", "json", "--global"]),
+        "domains-all": Command(["dokku", "domains:report"]),
+        "domains-app1": Command(["dokku", "domains:report", "app1"]),
+        "domains-global": Command(["dokku", "domains:report", "--global"]),
+    }
+
+    def fill():
+        cache.clear()
+        for key, command in reads.items():
+            cache.set(key, command.command[1], (0, key, ""), params=command.command[2:])
+
+    def cached():
+        return {key for key in reads if key in cache._entries}
+
+    fill()
+    assert cache.invalidate(Command(["dokku", "config:set", "app1", "A=1"])) == 1
+    assert cached() == set(reads) - {"config-app1"}
+    fill()
+    cache.invalidate(Command(["dokku", "config:set", "--global", "A=1"]))
+    assert cached() == {"domains-all", "domains-app1", "domains-global"}
+    fill()
+    cache.invalidate(Command(["dokku", "domains:add", "app1", "example.com"]))
+    assert cached() == {"config-app1", "config-app2", "config-global", "domains-global"}
+    fill()
+    cache.invalidate(Command(["dokku", "domains:add-global", "example.com"]))
+    assert cached() == {"config-app1", "config-app2", "config-global"}
+    fill()
+    cache.invalidate(Command(["dokku", "config:unset", "--unknown-option", "app2", "app1", "A"]))
+    assert cached() == {"domains-all", "domains-app1", "domains-global"}  # `app2` may be the option's value
+    fill()
+    cache.invalidate(Command(["dokku", "config:set", "--no-restart", "app1", "A=1"]))
+    assert cached() == set(reads) - {"config-app1"}
+    fill()
+    cache.invalidate(Command(["dokku", "apps:rename", "app1", "app3"]))
+    assert cached() == set()
+
+    # Writes without positional parameters (or with `--all`) are for all the apps
+    cache.set("ps-app1", "ps:report", (0, "", ""), params=("app1",))
+    cache.invalidate(Command(["dokku", "ps:restart", "--all"]))
+    assert len(cache) == 0
+    cache.set("ps-app1", "ps:report", (0, "", ""), params=("app1",))
+    cache.invalidate(Command(["dokku", "ps:rebuild", "--parallel", "2"]))
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize(
+    "read,write",
+    [
+        (["dokku", "network:list", "--format", "json"], ["dokku", "network:create", "mynet"]),
+        (["dokku", "ssh-keys:list", "--format", "json"], ["dokku", "ssh-keys:add", "bob"]),
+        (["dokku", "ssh-keys:list", "--format=json"], ["dokku", "ssh-keys:remove", "--fingerprint", "SHA256:abc"]),
+    ],
+)
+def test_command_cache_invalidate_option_values(read, write):
+    # Option values (like `json` in `--format json`) are not app names, so these lists are for all the entities
+    cache = CommandCache()
+    cache.set("key", read[1], (0, "[]", ""), params=read[2:])
+    assert cache.invalidate(Command(write)) == 1
+    assert len(cache) == 0
+
+
+def test_plugin_classification():
+    dokku = Dokku()
+    assert dokku.config._evaluate("export", ["app1"], execute=False).read_only is True
+    assert dokku.config._evaluate("set", ["app1", "A=1"], execute=False).read_only is False
+    assert dokku.apps._evaluate("report", execute=False).read_only is True
+    assert dokku.domains.add("app1", ["example.com"], execute=False).read_only is False
+    assert dokku.ps.set_scale("app1", {"web": 2}, execute=False).read_only is False
+    assert dokku.ps._evaluate("scale", ["app1"], execute=False).read_only is True
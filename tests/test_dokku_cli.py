@@ -1,7 +1,11 @@
+import threading
+
 import pytest
 
 from pydokku import ssh
 from pydokku.dokku_cli import Dokku
+from pydokku.filesystem import FilesystemReader, fetch_snapshot
+from pydokku.instrumentation import CommandStats
 from pydokku.models import Command
 from tests.utils import requires_dokku, requires_ssh_keygen
 
@@ -222,3 +226,160 @@ def test_prepare_command_local():
 
 # TODO: create tests which actuall *execute* Dokku SSH commands (use parameterized fixtures with a conditional one
 # based on env vars)
+
+
+def test_command_hooks():
+    dokku = Dokku()
+    started, finished, stats = [], [], CommandStats()
+    dokku.on_command_start.append(lambda event: started.append(event.return_code))
+    dokku.on_command_end.extend([finished.append, stats])
+    assert dokku._execute(Command(["echo", "ção"])) == (0, "ção\n", "")
+    with pytest.raises(RuntimeError, match="exited with status 1"):
+        dokku._execute(Command(["false"]))
+    assert started == [None, None]
+    assert [event.argv for event in finished] == [["echo", "ção"], ["false"]]
+    assert [event.return_code for event in finished] == [0, 1]
+    assert finished[0].stdout_bytes == 6 and finished[0].stderr_bytes == 0
+    assert all(event.duration >= 0 for event in finished)
+    assert stats.subcommands["echo"].count == 1
+    assert stats.subcommands["false"].failures == 1
+
+    finished.clear()
+    results = list(dokku.execute_many([Command(["echo", "a"]), Command(["echo", "b"])]))
+    assert results == [(0, "a\n", ""), (0, "b\n", "")]
+    assert [event.return_code for event in finished] == [0, 0]
+    assert finished[0].finished_at <= finished[1].started_at
+
+
+def test_execute_stream():
+    dokku = Dokku()
+    finished = []
+    dokku.on_command_end.append(finished.append)
+    process = dokku.execute_stream(Command(["sh", "-c", "echo line 1; echo line 2; echo err >&2"]))
+    assert list(process) == ["line 1\n", "line 2\n"]
+    assert process.return_code == 0
+    assert process.stderr == "err\n"
+    assert finished[0].stdout_bytes == 14 and finished[0].stderr_bytes == 4
+
+    process = dokku.execute_stream(Command(["cat"], stdin="a" * 100_000))
+    assert sum(len(chunk) for chunk in process.chunks(size=1000)) == 100_000
+
+    process = dokku.execute_stream(Command(["sh", "-c", "echo out; exit 3"]))
+    with pytest.raises(RuntimeError, match="exited with status 3"):
+        list(process)
+
+
+def test_execute_stream_cancel():
+    dokku = Dokku()
+    with dokku.execute_stream(Command(["sh", "-c", "while true; do echo y; sleep 0.01; done"])) as process:
+        for index, line in enumerate(process):
+            assert line == "y\n"
+            if index == 2:
+                break
+    assert process.cancelled
+    assert process.return_code != 0
+    assert not process.running
+
+
+def test_execute_stream_wait_discards_output():
+    dokku = Dokku()
+    process = dokku.execute_stream(Command(["head", "-c", "1000000", "/dev/zero"]))
+    waiter = threading.Thread(target=process.wait, daemon=True)
+    waiter.start()
+    waiter.join(timeout=10)
+    assert not waiter.is_alive()  # Would be blocked if the output (bigger than the pipe buffer) was not read
+    assert process.return_code == 0
+    assert process.stdout_bytes == 1_000_000
+
+
+def test_execute_spooled():
+    dokku = Dokku()
+    command = Command(["sh", "-c", "head -c 300000 /dev/zero; echo warning >&2"])
+    return_code, stdout, stderr = dokku.execute_spooled(command, max_memory=100_000)
+    with stdout:
+        assert (return_code, stderr) == (0, "warning\n")
+        assert stdout._rolled  # Spilled to disk
+        assert stdout.read() == b"\x00" * 300_000
+
+    return_code, stdout, stderr = dokku.execute_spooled(Command(["echo", "small"]))
+    with stdout:
+        assert not stdout._rolled
+        assert stdout.read() == b"small\n"
+
+    with pytest.raises(RuntimeError, match="exited with status 2"):
+        dokku.execute_spooled(Command(["sh", "-c", "echo out; exit 2"]))
+
+
+def test_execute_binary_stdin(temp_dir):
+    dokku = Dokku()
+    data = bytes(range(256)) * 1000
+    filename = temp_dir / "data.bin"
+    filename.write_bytes(data)
+    command = ["sh", "-c", "wc -c; od -An -tx1 | head -1"]
+    expected = f"{len(data)}\n"
+
+    def execute(stdin):
+        _, stdout, _ = dokku._execute(Command(command, stdin=stdin))
+        return stdout.splitlines()[0] + "\n"
+
+    assert execute(data) == expected
+    assert execute(filename) == expected
+    with filename.open(mode="rb") as fobj:
+        fobj.read(10)  # The command must read from the current position
+        assert execute(fobj) == f"{len(data) - 10}\n"
+    assert execute(iter([data[:1000], data[1000:]])) == expected
+    assert str(Command(["cat"], stdin=b"\x00\x01")) == "echo AAE= | base64 --decode | cat"
+    assert str(Command(["cat"], stdin=filename)) == f"cat < {filename}"
+
+    session_dokku = Dokku(shell_session=True)
+    try:
+        assert session_dokku._execute(Command(["wc", "-c"], stdin=filename))[1] == expected
+        assert [result[1] for result in session_dokku.execute_many([Command(["wc", "-c"], stdin=filename)])] == [
+            expected
+        ]
+    finally:
+        session_dokku.close()
+
+
+def test_plugin_apps_config(temp_dir):
+    config_path = temp_dir / "config" / "letsencrypt"
+    configs = {"app1": {"email": "a@example.net\n", "server": "staging"}, "--global": {"email": "g"}}
+    for app_name, files in configs.items():
+        (config_path / app_name).mkdir(parents=True)
+        for filename, content in files.items():
+            (config_path / app_name / filename).write_text(content)
+    (config_path / "app1" / ".hidden").write_text("")
+    dokku = Dokku(lib_root=temp_dir)
+    finished = []
+    dokku.on_command_end.append(finished.append)
+    apps_names = ["--global", "app1", "app2"]
+    result = dokku.plugin_apps_config("letsencrypt", apps_names)
+    assert len(finished) == 1  # All the apps in one command
+    assert result == {
+        "--global": {"email": "g"},
+        "app1": {"email": "a@example.net\n", "server": "staging"},
+        "app2": {},
+    }
+    assert result == {app_name: dokku.plugin_app_config("letsencrypt", app_name) for app_name in apps_names}
+
+    # Frames are read as bytes, so CRLF and non-UTF-8 contents won't shift the next frames
+    (config_path / "app1" / "email").write_bytes(b"A=1\r\nB=2\r\n")
+    (config_path / "app1" / "server").write_bytes(b"\xff")
+    (config_path / "app2").mkdir()
+    (config_path / "app2" / "email").write_text("C=3\n")
+    result = dokku.plugin_apps_config("letsencrypt", apps_names)
+    assert result["app1"] == {"email": "A=1\r\nB=2\r\n", "server": "\ufffd"}
+    assert result["app2"] == {"email": "C=3\n"}
+    reader = FilesystemReader(root_path=temp_dir, lib_path=temp_dir)
+    snapshot = fetch_snapshot(dokku, root_path=str(temp_dir))
+    try:
+        for app_name in apps_names:
+            assert reader.plugin_app_config("letsencrypt", app_name) == result[app_name]
+            assert snapshot.plugin_app_config("letsencrypt", app_name) == result[app_name]
+    finally:
+        snapshot.close()
+
+    # Errors (like `sudo` failures) are not reported as empty configs
+    dokku._prepare_command = lambda command, include_ssh=True: ["sh", "-c", "echo denied >&2; exit 1"]
+    with pytest.raises(RuntimeError, match="denied"):
+        dokku.plugin_apps_config("letsencrypt", apps_names)
@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+
+from pydokku.executor import DependencyExecutor
+
+
+def test_order():
+    dependencies = {"a": (), "b": ("a",), "c": ("a",), "d": ("c",), "e": ("b", "d"), "f": ("c",)}
+    executor = DependencyExecutor(dependencies)
+    assert executor.order == ["a", "b", "c", "d", "f", "e"]
+
+
+def test_inconsistent_dependencies():
+    with pytest.raises(RuntimeError, match="remaining"):
+        DependencyExecutor({"a": ("b",), "b": ("a",)})
+    with pytest.raises(RuntimeError, match="unknown"):
+        DependencyExecutor({"a": ("z",)})
+
+
+def test_run_respects_dependencies():
+    dependencies = {"a": (), "b": ("a",), "c": ("a",), "d": ("c",), "e": ("b", "d"), "f": ("c",)}
+    finished, lock = [], threading.Lock()
+
+    def task(node):
+        for dependency in dependencies[node]:
+            assert dependency in finished
+        time.sleep(0.01)
+        with lock:
+            finished.append(node)
+        return node.upper()
+
+    done = []
+    executor = DependencyExecutor(dependencies, max_workers=4)
+    results = executor.run(task, on_done=lambda node, result: done.append(node))
+    assert results == {node: node.upper() for node in dependencies}
+    assert sorted(done) == sorted(dependencies)
+    assert set(executor.timings.keys()) == set(dependencies.keys())
+
+
+def test_run_does_not_wait_for_unrelated_nodes():
+    # `slow` and `fast` are both ready at start; `after_fast` must not wait for `slow` to finish
+    dependencies = {"slow": (), "fast": (), "after_fast": ("fast",)}
+
+    def task(node):
+        time.sleep(0.3 if node == "slow" else 0.01)
+
+    executor = DependencyExecutor(dependencies, max_workers=3)
+    executor.run(task)
+    assert executor.timings["after_fast"].finished_at < executor.timings["slow"].finished_at
+    assert executor.critical_path() == ["slow"]
+
+
+def test_critical_path():
+    dependencies = {"a": (), "b": ("a",), "c": ("a",), "d": ("b", "c")}
+    durations = {"a": 0.01, "b": 0.2, "c": 0.01, "d": 0.01}
+    executor = DependencyExecutor(dependencies, max_workers=2)
+    executor.run(lambda node: time.sleep(durations[node]))
+    assert executor.critical_path() == ["a", "b", "d"]
+
+
+def test_run_error():
+    dependencies = {"a": (), "b": ("a",), "c": ()}
+    executed = []
+
+    def task(node):
+        executed.append(node)
+        if node == "a":
+            raise ValueError("error in a")
+
+    executor = DependencyExecutor(dependencies, max_workers=1)
+    with pytest.raises(ValueError, match="error in a"):
+        executor.run(task)
+    assert "b" not in executed
@@ -0,0 +1,128 @@
+import pytest
+
+from pydokku.dokku_cli import Dokku
+from pydokku.filesystem import FilesystemReader, fetch_snapshot
+from pydokku.models import Domain, Redirect
+
+
+@pytest.fixture
+def dokku_files(temp_dir):
+    root_path, lib_path = temp_dir / "home", temp_dir / "lib"
+    app_path = root_path / "test-app"
+    app_path.mkdir(parents=True)
+    (root_path / "tls").mkdir()
+    (root_path / ".ssh").mkdir()
+    (root_path / "ENV").write_text("export GLOBAL_KEY='global'\nexport SHARED='from global'\n")
+    (root_path / "VHOST").write_text("example.net\n")
+    (app_path / "ENV").write_text("export SHARED='from app'\nexport NO_VHOST='1'\nexport TEXT='it'\\''s\nok'\n")
+    (app_path / "VHOST").write_text("test-app.example.net\nwww.example.com\n")
+    (app_path / "REDIRECTS").write_text("old.example.com:new.example.com:301\n")
+    (app_path / ".deploy.lock").write_text("")
+    storage_path = temp_dir / "storage" / "test-app-data"
+    storage_path.mkdir(parents=True)
+    (app_path / "DOCKER_OPTIONS_DEPLOY").write_text(f"--restart=on-failure:10\n-v {storage_path}:/data\n")
+    properties_path = lib_path / "config" / "apps" / "test-app"
+    properties_path.mkdir(parents=True)
+    (properties_path / "created-at").write_text("1700000000")
+    (properties_path / "deploy-source").write_text("git-sync")
+    return FilesystemReader(root_path=root_path, lib_path=lib_path), storage_path
+
+
+def test_filesystem_reader(dokku_files):
+    reader, storage_path = dokku_files
+    assert reader.available()
+    apps = reader.apps()
+    assert [app.name for app in apps] == ["test-app"]
+    assert apps[0].locked is True
+    assert apps[0].created_at.timestamp() == 1700000000
+    assert apps[0].deploy_source == "git-sync" and apps[0].deploy_source_metadata is None
+    assert reader.config(None) == {"GLOBAL_KEY": "global", "SHARED": "from global"}
+    assert reader.config("test-app") == {"SHARED": "from app", "NO_VHOST": "1", "TEXT": "it's\nok"}
+    assert reader.config("test-app", merged=True)["GLOBAL_KEY"] == "global"
+    assert reader.domains() == [
+        Domain(app_name=None, enabled=True, domains=["example.net"]),
+        Domain(app_name="test-app", enabled=False, domains=["test-app.example.net", "www.example.com"]),
+    ]
+    assert reader.redirects("test-app") == [
+        Redirect(app_name="test-app", source="old.example.com", destination="new.example.com", code=301)
+    ]
+    storages = reader.storage("test-app")
+    assert [(storage.host_path, str(storage.container_path)) for storage in storages] == [(storage_path, "/data")]
+    options_path = reader.root_path / "test-app" / "DOCKER_OPTIONS_DEPLOY"
+    options_path.write_text(f"-v {storage_path}:/data:ro\n--volume /var/log:/logs:rw,z\n")
+    storages = reader.storage("test-app")
+    assert [(str(storage.host_path), str(storage.container_path)) for storage in storages] == [
+        (str(storage_path), "/data"),
+        ("/var/log", "/logs"),
+    ]
+
+    # Missing apps and unknown formats are reported as `None`, so the commands are executed instead
+    assert reader.config("other-app") is None
+    (reader.root_path / "VHOST").write_text("10.0.0.1\n")
+    assert reader.domains()[0].enabled is False
+    (reader.root_path / "test-app" / "REDIRECTS").write_text("invalid\n")
+    assert reader.redirects("test-app") is None
+
+
+def test_dokku_filesystem_backend(dokku_files, monkeypatch):
+    reader, storage_path = dokku_files
+    dokku = Dokku()
+    assert dokku.filesystem is None
+    dokku.filesystem = reader
+    executed = []
+
+    def execute(command, *args, **kwargs):
+        executed.append(command.command)
+        return 0, "[]", ""
+
+    monkeypatch.setattr(dokku, "_execute", execute)
+    assert [app.name for app in dokku.apps.list()] == ["test-app"]
+    assert dokku.config.get("test-app", as_dict=True)["SHARED"] == "from app"
+    assert len(dokku.domains.list()) == 2
+    assert dokku.redirect.list("test-app")[0].code == 301
+    storage = dokku.storage.list("test-app")[0]
+    assert storage.user_id == storage_path.stat().st_uid
+    assert executed == []
+
+    assert dokku.storage.list("other-app") == []  # Not found in the files: falls back to the command
+    assert executed == [["dokku", "storage:list", "other-app", "--format", "json"]]
+
+
+def test_fetch_snapshot(dokku_files):
+    reader, storage_path = dokku_files
+    git_path = reader.lib_path / "plugins" / "available" / "postgres" / ".git"
+    git_path.mkdir(parents=True)
+    (git_path / "HEAD").write_text("ref: refs/heads/master\n")
+    (git_path / "config").write_text('[remote "origin"]\n\turl = https://github.com/dokku/dokku-postgres.git\n')
+    dokku = Dokku(lib_root=reader.lib_path)
+    snapshot = fetch_snapshot(dokku, root_path=str(reader.root_path))
+    try:
+        assert [app.path for app in snapshot.apps()] == [reader.root_path / "test-app"]
+        assert snapshot.apps() == reader.apps()
+        assert snapshot.config("test-app", merged=True) == reader.config("test-app", merged=True)
+        assert snapshot.domains() == reader.domains()
+        assert snapshot.redirects("test-app") == reader.redirects("test-app")
+        assert snapshot.storage("test-app") == reader.storage("test-app")
+        assert snapshot.path_owner(storage_path) == reader.path_owner(storage_path)
+        properties = snapshot.plugin_app_config("apps", "test-app")
+        assert properties == {"created-at": "1700000000", "deploy-source": "git-sync"}
+        assert snapshot.plugin_app_config("letsencrypt", "test-app") == {}
+        head, config = snapshot.plugin_git_files("postgres")
+        assert head == "ref: refs/heads/master\n" and "dokku-postgres.git" in config
+    finally:
+        snapshot.close()
+    assert not snapshot.base_path.exists()
+
+    # Messages printed by SSH (stderr) or a login shell (stdout, before the script runs) don't break the snapshot
+    prepare_command = dokku._prepare_command
+    wrapper = 'echo "Warning: Permanently added example.net" >&2; echo "Welcome"; exec "$0" "$@"'
+    dokku._prepare_command = lambda command, include_ssh=True: ["sh", "-c", wrapper] + prepare_command(command, False)
+    snapshot = fetch_snapshot(dokku, root_path=str(reader.root_path))
+    try:
+        assert snapshot.apps() == reader.apps()
+    finally:
+        snapshot.close()
+
+    dokku = Dokku(ssh_host="example.net", ssh_user="dokku", interactive=True, ssh_mux_prewarm=False)
+    with pytest.raises(RuntimeError, match="no filesystem access"):
+        fetch_snapshot(dokku)
@@ -1,7 +1,15 @@
+import subprocess
+import sys
+import time
 from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
 
 from pydokku import Dokku
-from pydokku.cli import dokku_apply, dokku_export
+from pydokku.cli import apply_task_graph, dokku_apply, dokku_export
+from pydokku.models import App, Config, Domain, Plugin
+from pydokku.plugins import BUILTIN_PLUGINS, PluginRegistry, discover_plugins
 from pydokku.plugins.base import PluginScheduler
 from pydokku.utils import execute_command
 from tests.utils import requires_dokku
@@ -44,6 +52,197 @@ def test_PluginScheduler():
     assert result == expected
 
 
+def test_object_split_by_app():
+    dokku = Dokku()
+    configs = [
+        Config(app_name="app-1", key="A", value="1"),
+        Config(app_name=None, key="B", value="2"),
+        Config(app_name="app-2", key="C", value="3"),
+        Config(app_name="app-1", key="D", value="4"),
+    ]
+    system_objs, apps_objs = dokku.config.object_split_by_app(configs)
+    assert system_objs == [configs[1]]
+    assert apps_objs == {"app-1": [configs[0], configs[3]], "app-2": [configs[2]]}
+
+    # If there's no system object, the first object of each type is the system one (may hide global settings)
+    apps = [App(name=f"app-{n}", path=Path(f"/home/dokku/app-{n}"), locked=False) for n in range(1, 3 + 1)]
+    system_objs, apps_objs = dokku.apps.object_split_by_app(apps)
+    assert system_objs == [apps[0]]
+    assert apps_objs == {"app-2": [apps[1]], "app-3": [apps[2]]}
+
+
+def test_apply_task_graph():
+    dokku = Dokku()
+    plugins = {name: dokku.plugins[name] for name in ("apps", "config", "domains", "redirect")}
+    plugins_objects = {
+        "apps": [App(name=f"app-{n}", path=Path(f"/home/dokku/app-{n}"), locked=False) for n in range(1, 3 + 1)],
+        "config": [Config(app_name=None, key="A", value="1"), Config(app_name="app-2", key="B", value="2")],
+        "domains": [
+            Domain(app_name=None, enabled=True, domains=[]),
+            Domain(app_name="app-1", enabled=True, domains=["a.example.net"]),
+            Domain(app_name="app-3", enabled=False, domains=[]),
+        ],
+        "redirect": [],
+    }
+    dependencies, tasks = apply_task_graph(plugins=plugins, plugins_objects=plugins_objects)
+    assert tasks[("apps", None)] == ([plugins_objects["apps"][0]], False)
+    assert tasks[("apps", "app-2")] == ([plugins_objects["apps"][1]], True)
+    assert tasks[("config", None)] == ([plugins_objects["config"][0]], False)
+    assert tasks[("config", "app-2")] == ([plugins_objects["config"][1]], True)
+    assert tasks[("redirect", None)] == ([], False)
+    assert ("config", "app-1") not in tasks
+    assert dependencies[("apps", None)] == []
+    assert dependencies[("apps", "app-2")] == [("apps", None)]
+    assert dependencies[("config", None)] == [("apps", None)]
+    assert dependencies[("config", "app-2")] == [("apps", "app-2"), ("config", None)]
+    # `app-1` is created by the `apps` system task (it's the first `App`)
+    assert dependencies[("domains", "app-1")] == [("domains", None)]
+    assert dependencies[("domains", "app-3")] == [("apps", "app-3"), ("domains", None)]
+    # `redirect` requires `apps` and `domains`, but there are no redirects
+    assert dependencies[("redirect", None)] == [("apps", None), ("domains", None)]
+
+
+def test_plugin_registry_is_lazy():
+    dokku = Dokku()
+    assert set(dokku.plugins.keys()) == set(BUILTIN_PLUGINS.keys())
+    assert dokku.plugins.loaded() == {} and "apps" in dokku.plugins
+    assert dokku.apps is dokku.plugins["apps"] is dokku.apps
+    assert list(dokku.plugins.loaded().keys()) == ["apps"]
+    assert "ps" in dir(dokku)
+    assert [name for name, plugin in dokku.plugins.items() if plugin.name != name] == []
+    with pytest.raises(AttributeError, match="no attribute 'not_a_plugin'"):
+        dokku.not_a_plugin
+
+    registry = PluginRegistry(factory=lambda klass: klass.name, specs={"app": "pydokku.plugins.apps:AppsPlugin"})
+    with pytest.raises(RuntimeError, match="different name: 'apps'"):
+        registry["app"]
+    with pytest.raises(KeyError):
+        registry["apps"]
+
+
+def test_plugin_registry_entry_points(temp_dir, monkeypatch):
+    (temp_dir / "acme_dokku_plugins.py").write_text(
+        "from pydokku.plugins.base import DokkuPlugin\n\n"
+        "class AcmePlugin(DokkuPlugin):\n"
+        "    name = subcommand = plugin_name = 'acme'\n"
+        "    requires = ('apps',)\n"
+        "    requires_extra_commands = False\n"
+    )
+    dist_info = temp_dir / "acme_dokku_plugins-1.0.dist-info"
+    dist_info.mkdir()
+    (dist_info / "METADATA").write_text("Metadata-Version: 2.1\nName: acme-dokku-plugins\nVersion: 1.0\n")
+    (dist_info / "entry_points.txt").write_text(
+        "[pydokku.plugins]\n"
+        "acme = acme_dokku_plugins:AcmePlugin\n"
+        "apps = acme_dokku_plugins:AcmePlugin\n"
+        "broken = acme_dokku_plugins_missing:BrokenPlugin\n"
+    )
+    monkeypatch.syspath_prepend(str(temp_dir))
+    assert discover_plugins()["acme"] == "acme_dokku_plugins:AcmePlugin"
+
+    try:
+        dokku = Dokku()
+        assert dokku.apps.__class__.__name__ == "AppsPlugin"  # Built-in plugins can't be replaced
+        assert "acme_dokku_plugins" not in sys.modules
+        assert "acme" in dokku.plugins and "acme_dokku_plugins" not in sys.modules
+        assert dokku.acme.name == "acme" and dokku.acme.dokku is dokku
+        # A plugin which can't be imported is skipped when loading all of them (and reported in `errors`)
+        scheduler = PluginScheduler(plugins=dokku.plugins.values())
+        assert any("acme" in batch for batch in scheduler)
+        assert list(dokku.plugins.errors.keys()) == ["broken"] and "broken" not in dokku.plugins
+        with pytest.raises(RuntimeError, match="Cannot load plugin 'broken'"):
+            Dokku().plugins["broken"]
+    finally:
+        sys.modules.pop("acme_dokku_plugins", None)
+
+
+@pytest.mark.parametrize("jobs", [2, 4])
+def test_export_concurrent_order(jobs, monkeypatch, capsys):
+    # Plugins finishing in a different order (because of the delays) must not change the output
+    class StubObject:
+        def __init__(self, plugin_name, app_name):
+            self.plugin_name, self.app_name = plugin_name, app_name
+
+        def serialize(self):
+            return {"plugin": self.plugin_name, "app_name": self.app_name}
+
+    class StubPlugin:
+        requires_extra_commands = False
+
+        def __init__(self, name, delay, requires=()):
+            self.name = self.plugin_name = name
+            self.delay, self.requires = delay, requires
+
+        def object_list(self, apps, system=True):
+            time.sleep(self.delay)
+            return [StubObject(self.name, app.name) for app in apps]
+
+    class StubRegistry(dict):
+        errors = {}
+
+    class StubDokku:
+        can_execute_regular_commands = True
+        filesystem = None
+
+        def __init__(self):
+            self.on_command_end = []
+            stubs = [
+                StubPlugin("slow", 0.2),
+                StubPlugin("fast", 0.0),
+                StubPlugin("after-slow", 0.0, requires=("slow",)),
+                StubPlugin("medium", 0.1),
+                StubPlugin("after-fast", 0.15, requires=("fast",)),
+            ]
+            self.plugins = StubRegistry((stub.name, stub) for stub in stubs)
+            installed = [Plugin(name=stub.name, version="1.0", enabled=True, description="") for stub in stubs]
+            self.plugin = SimpleNamespace(list=lambda: installed)
+            apps = [App(name=name, path=Path("/home/dokku") / name, locked=False) for name in ("app1", "app2")]
+            self.apps = SimpleNamespace(list=lambda: apps)
+
+        def version(self):
+            return (0, 35, 0)
+
+    def export(jobs):
+        data = dokku_export(ssh_config={}, jobs=jobs)
+        log = [line for line in capsys.readouterr().err.splitlines() if not line.startswith("Critical path")]
+        return data, log
+
+    monkeypatch.setattr("pydokku.cli.create_dokku_instance", lambda ssh_config: StubDokku())
+    sequential_data, sequential_log = export(jobs=1)
+    concurrent_data, concurrent_log = export(jobs=jobs)
+    assert list(concurrent_data.keys()) == list(sequential_data.keys())
+    assert concurrent_data == sequential_data
+    assert concurrent_log == sequential_log
+    assert concurrent_data["after-fast"] == [
+        {"plugin": "after-fast", "app_name": "app1"},
+        {"plugin": "after-fast", "app_name": "app2"},
+    ]
+
+
+# Cumulative import time of `pydokku.cli` plus `Dokku()` (around 0.15s when plugins are not loaded eagerly). It's
+# generous so slow CI machines won't fail, but any plugin module imported at startup makes the test fail.
+IMPORT_TIME_BUDGET_US = 1_000_000
+
+
+def test_import_time():
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import pydokku.cli; pydokku.Dokku()"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_time, module = line.split("|")
+        if cumulative_time.strip().isdigit():
+            cumulative[module.strip()] = int(cumulative_time)
+    plugins_modules = [name for name in cumulative if name.startswith("pydokku.plugins.")]
+    assert plugins_modules == ["pydokku.plugins.base"]
+    assert cumulative["pydokku.cli"] < IMPORT_TIME_BUDGET_US
+
+
 @requires_dokku
 def test_export_apply():
     current_path = Path(__file__).parent
@@ -225,6 +225,31 @@ def test_from_image_command():
         dokku.git.from_image(app_name=app_name, image=image, git_username=None, git_email=git_email, execute=False)
 
 
+def test_load_image_command(temp_dir):
+    app_name = "test-app-9"
+    image = "myimage:1.0"
+    filename = temp_dir / "my image.tar"
+    dokku = Dokku()
+    command = dokku.git.load_image(app_name=app_name, image=image, data=filename, execute=False)
+    assert command.command == ["dokku", "git:load-image", app_name, image]
+    assert command.stdin == filename
+    assert command.check is True
+    assert command.sudo is False
+    assert str(command) == f"dokku git:load-image {app_name} {image} < '{filename}'"
+
+    command = dokku.git.load_image(
+        app_name=app_name, image=image, data=str(filename), build_path="/tmp/build", execute=False
+    )
+    assert command.command == ["dokku", "git:load-image", "--build-dir", "/tmp/build", app_name, image]
+    assert command.stdin == filename
+
+    command = dokku.git.load_image(app_name=app_name, image=image, data=iter([b"data"]), execute=False)
+    assert str(command) == f"dokku git:load-image {app_name} {image}  # stdin: binary stream"
+
+    with pytest.raises(ValueError, match="`git_username` is required for using `git_email`"):
+        dokku.git.load_image(app_name=app_name, image=image, data=filename, git_email="a@example.net", execute=False)
+
+
 def test_from_archive_command():
     app_name = "test-app-9"
     archive_url = "https://example.com/archives/nginx-1.27.tar.gz"
@@ -1,4 +1,5 @@
 import datetime
+import io
 from textwrap import dedent
 
 from pydokku.dokku_cli import Dokku
@@ -151,3 +152,35 @@ def test_parse_list():
 
 # TODO: test object_list
 # TODO: test object_create
+
+
+def test_list_command_count(monkeypatch):
+    apps_names = [f"app-{number}" for number in range(50)]
+    list_stdout = "-----> App name           Certificate Expiry        Time before expiry        Time before renewal\n"
+    for app_name in apps_names:
+        list_stdout += f"{app_name}  2025-03-23 05:25:43       53d, 23h, 52m, 51s        23d, 23h, 52m, 51s\n"
+    dokku = Dokku()
+    executed, batches = [], []
+
+    def execute(command):
+        executed.append(command.command[:2])
+        return 0, list_stdout, ""
+
+    def execute_spooled(command):
+        executed.append(command.command[:2])
+        return 0, io.BytesIO(b""), ""  # No options set (`plugin_apps_config` script)
+
+    def execute_many(commands):
+        batches.append([command.command for command in commands])
+        return iter([(0, "true\n" if index % 2 == 0 else "false\n", "") for index in range(len(batches[-1]))])
+
+    monkeypatch.setattr(dokku, "_execute", execute)
+    monkeypatch.setattr(dokku, "execute_spooled", execute_spooled)
+    monkeypatch.setattr(dokku, "execute_many", execute_many)
+    result = dokku.letsencrypt.list()
+    assert len(result) == len(apps_names) + 1
+    assert result[0].app_name is None and result[0].enabled is True
+    assert [obj.enabled for obj in result[1:3]] == [True, False]
+    # Constant number of round trips: `letsencrypt:list`, the options script and one batch of `letsencrypt:active`
+    assert executed == [["dokku", "letsencrypt:list"], ["sh", "-c"]]
+    assert batches == [[["dokku", "letsencrypt:active", app_name] for app_name in apps_names]]
@@ -1,6 +1,8 @@
 import datetime
 from pathlib import Path
 
+import pytest
+
 from pydokku import Dokku
 from pydokku.models import Nginx
 from tests.utils import requires_dokku
@@ -31,6 +33,17 @@ def test_error_logs_command():
     assert command.sudo is False
 
 
+def test_logs_tail_command():
+    app_name = "test-app-1"
+    dokku = Dokku()
+    command = dokku.nginx.access_logs(app_name=app_name, tail=True, execute=False)
+    assert command.command == ["dokku", "nginx:access-logs", app_name, "-t"]
+    command = dokku.nginx.error_logs(app_name=app_name, tail=True, execute=False)
+    assert command.command == ["dokku", "nginx:error-logs", app_name, "-t"]
+    with pytest.raises(ValueError, match="requires `stream=True`"):
+        dokku.nginx.access_logs(app_name=app_name, tail=True)
+
+
 def test_parse_stdout():
     stdout = """
         =====> test-app-1 nginx information
@@ -192,6 +205,10 @@ def test_parse_stdout():
     result = rows_parser(stdout)
     result[0]["last_visited_at"] = result[0]["last_visited_at"].utctimetuple()
     assert result == expected
+    # Same result from bytes and with messages before the first header (the parsed keys are reused)
+    result = rows_parser(b"-----> Some warning\n" + stdout.encode("utf-8"))
+    result[0]["last_visited_at"] = result[0]["last_visited_at"].utctimetuple()
+    assert result == expected
 
 
 def test_convert_rows():
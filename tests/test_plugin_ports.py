@@ -1,7 +1,10 @@
 from textwrap import dedent
 
+import pytest
+
 from pydokku import Dokku
-from pydokku.models import Port
+from pydokku.cli import dokku_apply
+from pydokku.models import Plugin, Port
 from tests.utils import requires_dokku
 
 
@@ -126,6 +129,32 @@ def test_set_command():
     assert commands[1].sudo is False
 
 
+def test_batch_apply_checks_results(monkeypatch):
+    # `ports:set` exits with `0` on errors, so the output of each batched command is checked by the plugin
+    dokku = Dokku()
+    dokku._dokku_version = (0, 35, 15)
+    dokku.plugin.list = lambda: [Plugin(name="ports", version="0.35.15", enabled=True, description="")]
+    batches = []
+
+    def execute_many(commands):
+        batches.append([command.command for command in commands])
+        yield (0, "", "")
+        yield (0, " !     No port set, setting ports via the detected values\n", "")
+
+    dokku.execute_many = execute_many
+    monkeypatch.setattr("pydokku.cli.create_dokku_instance", lambda ssh_config: dokku)
+    ports = [
+        {"app_name": "test-app-1", "scheme": "http", "host_port": 80, "container_port": 5000},
+        {"app_name": "test-app-2", "scheme": "http", "host_port": 80, "container_port": None},
+    ]
+    data = {"pydokku": {"version": "0.1.0"}, "dokku": {"version": "0.35.15"}, "ports": ports}
+    with pytest.raises(RuntimeError, match="Cannot set port to app test-app-2: .*No port set"):
+        dokku_apply(data=data, ssh_config={}, quiet=True, batch=True)
+    assert batches == [  # The commands for all the apps are sent at once
+        [["dokku", "ports:set", "test-app-1", "http:80:5000"], ["dokku", "ports:set", "test-app-2", "http:80"]]
+    ]
+
+
 def test_set_command_old():
     app_name_1 = "test-app-1"
     app_name_2 = "test-app-2"
@@ -3,7 +3,7 @@ from pathlib import Path
 import pytest
 
 from pydokku import Dokku
-from pydokku.models import Process, ProcessInfo
+from pydokku.models import App, Process, ProcessInfo
 
 
 def test_object_classes():
@@ -388,3 +388,36 @@ def test_convert_rows():
     dokku = Dokku()
     result = dokku.ps._convert_rows(input_rows)
     assert result == all_processes
+
+
+@pytest.mark.parametrize("apps_count", [3, 30, 300])
+def test_object_list_command_count(apps_count, monkeypatch):
+    apps = [
+        App(name=f"app-{number}", path=Path(f"/home/dokku/app-{number}"), locked=False) for number in range(apps_count)
+    ]
+    report = ""
+    for number, app in enumerate(apps):
+        deployed = number % 2 == 0
+        report += f"=====> {app.name} ps information\n"
+        report += f"    Deployed: {str(deployed).lower()}\n    Ps global procfile path: Procfile\n"
+        if deployed:
+            report += "    Status web 1: running (CID: c6a5533b5f9)\n"
+    dokku = Dokku()
+    executed, batches = [], []
+
+    def execute(command):
+        executed.append(command.command)
+        return 0, report, ""
+
+    def execute_many(commands):
+        batches.append([command.command for command in commands])
+        return iter([(0, "proctype: qty\n--------: ---\nweb: 2\n", "")] * len(batches[-1]))
+
+    monkeypatch.setattr(dokku, "_execute", execute)
+    monkeypatch.setattr(dokku, "execute_many", execute_many)
+    result = dokku.ps.object_list(apps)
+    assert [process_info.app_name for process_info in result] == [app.name for app in apps]
+    assert [len(process_info.processes) for process_info in result[:2]] == [1, 2]
+    # The number of round trips doesn't depend on the number of apps
+    assert executed == [["dokku", "ps:report"]]
+    assert len(batches) == 1 and len(batches[0]) == apps_count // 2
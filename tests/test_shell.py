@@ -0,0 +1,118 @@
+import pytest
+
+from pydokku import Dokku, ssh
+from pydokku.models import Command
+from pydokku.shell import ShellSession, execute_script
+
+
+def test_shell_session_execute():
+    session = ShellSession()
+    try:
+        assert session.execute(["echo", "hello world"]) == (0, "hello world\n", "")
+        assert session.execute(["cat"], stdin="some\nstdin ção\n") == (0, "some\nstdin ção\n", "")
+        assert session.execute(["sh", "-c", "echo out; echo err >&2; exit 3"], check=False) == (3, "out\n", "err\n")
+        # Commands without stdin must not consume the session's script
+        assert session.execute(["cat"]) == (0, "", "")
+        with pytest.raises(RuntimeError, match="exited with status 1"):
+            session.execute(["false"])
+        assert session.running
+    finally:
+        session.close()
+    assert not session.running
+
+
+def test_shell_session_execute_many():
+    session = ShellSession()
+    try:
+        # Big outputs must not block the session while the commands are still being written
+        commands = [(["seq", "1", "50000"], None) for _ in range(5)] + [(["echo", "last"], None)]
+        results = session.execute_many(commands)
+        assert len(results) == 6
+        expected_seq = "".join(f"{number}\n" for number in range(1, 50000 + 1))
+        for result in results[:-1]:
+            assert result == (0, expected_seq, "")
+        assert results[-1] == (0, "last\n", "")
+    finally:
+        session.close()
+
+
+def test_shell_session_restarts():
+    session = ShellSession()
+    try:
+        with pytest.raises(RuntimeError, match="terminated unexpectedly"):
+            session.execute_many([(["echo", "before exit"], None), (["sh", "-c", "kill -9 $PPID"], None)])
+    finally:
+        session.close()
+    try:
+        assert session.execute(["echo", "ok"]) == (0, "ok\n", "")
+    finally:
+        session.close()
+
+
+
+def test_shell_session_recovers_from_read_errors(monkeypatch):
+    session = ShellSession()
+    try:
+        # Non-UTF-8 output is decoded with replacement characters
+        assert session.execute_many([(["printf", "\\377"], None)]) == [(0, "\ufffd", "")]
+        session.execute(["true"])
+        # Any error while reading the frames stops the shell, so the next command starts a new one
+        def broken_frames():
+            raise ValueError("cannot read frame")
+            yield
+
+        monkeypatch.setattr(session, "_frames", broken_frames())
+        with pytest.raises(ValueError, match="cannot read frame"):
+            session.execute_many([(["echo", "lost"], None)])
+        assert not session.running
+        assert session.execute(["echo", "ok"]) == (0, "ok\n", "")
+    finally:
+        session.close()
+
+
+def test_dokku_shell_session():
+    dokku = Dokku(shell_session=True)
+    try:
+        assert dokku._execute(Command(["echo", "hello"])) == (0, "hello\n", "")
+        assert dokku._session.running
+    finally:
+        dokku.close()
+    assert not dokku._session.running
+
+
+def test_dokku_shell_session_ssh_user_dokku(monkeypatch):
+    with pytest.raises(ValueError, match="`shell_session` cannot be used"):
+        Dokku(ssh_host="example.net", ssh_user="dokku", interactive=True, ssh_mux=False, shell_session=True)
+
+    prewarmed = []
+    monkeypatch.setattr(ssh.SSHPool, "prewarm", lambda self, noop: prewarmed.append(noop))
+    with pytest.raises(ValueError, match="`shell_session` cannot be used"):
+        Dokku(ssh_host="example.net", ssh_user="dokku", interactive=True, shell_session=True, ssh_mux_prewarm=True)
+    assert prewarmed == []  # Invalid arguments don't start SSH masters
+    Dokku(ssh_host="example.net", ssh_user="dokku", interactive=True)
+    assert prewarmed == []  # Disabled by default in the library
+
+
+def test_execute_script():
+    commands = [
+        (["echo", "first"], None, True),
+        (["cat"], "some stdin", True),
+        (["sh", "-c", "echo err >&2; exit 2"], None, False),
+        (["sh", "-c", "exit 3"], None, True),
+        (["echo", "not executed"], None, True),
+    ]
+    results = list(execute_script([], commands))
+    assert results == [(0, "first\n", ""), (0, "some stdin", ""), (2, "", "err\n"), (3, "", "")]
+
+
+def test_dokku_execute_many():
+    dokku = Dokku()
+    commands = [Command(["echo", "a"]), Command(["cat"], stdin="b"), Command(["false"], check=False)]
+    assert list(dokku.execute_many(commands)) == [(0, "a\n", ""), (0, "b", ""), (1, "", "")]
+    assert list(dokku.execute_many([])) == []
+
+    results = []
+    with pytest.raises(RuntimeError, match="exited with status 1"):
+        for result in dokku.execute_many([Command(["echo", "ok"]), Command(["false"]), Command(["echo", "no"])]):
+            results.append(result)
+    assert results == [(0, "ok\n", "")]
@@ -0,0 +1,51 @@
+import json
+import threading
+
+from pydokku import Dokku
+from pydokku.instrumentation import CommandEvent
+from pydokku.models import Command
+from pydokku.trace import TraceRecorder
+
+
+def test_trace_recorder(temp_dir):
+    tracer = TraceRecorder()
+    dokku = Dokku()
+    dokku.on_command_end.append(tracer.command_hook)
+    with tracer.span("first.object_list", "plugin", plugin="first", stage=0):
+        dokku._execute(Command(["echo", "hello"]))
+        event = CommandEvent(Command(["dokku", "config:set", "--encoded", "app1", "KEY=c2VjcmV0"]), argv=[])
+        event.finish(0, "", "")
+        tracer.command_hook(event)
+
+    def other_thread():
+        with tracer.span("second.object_list", "plugin", plugin="second", stage=1):
+            pass
+
+    thread = threading.Thread(target=other_thread)
+    thread.start()
+    thread.join()
+    filename = temp_dir / "trace.json"
+    tracer.save(filename)
+
+    events = json.loads(filename.read_text())["traceEvents"]
+    metadata = [event for event in events if event["ph"] == "M"]
+    spans = {event["name"]: event for event in events if event["ph"] == "X"}
+    assert set(spans.keys()) == {
+        "first.object_list",
+        "second.object_list",
+        "echo",
+        "config:set",
+        "stage 0",
+        "stage 1",
+    }
+    assert spans["echo"]["cat"] == "command"
+    assert spans["echo"]["args"]["app_name"] is None
+    # Command parameters (like config values) are not saved
+    assert spans["config:set"]["args"]["app_name"] == "app1"
+    assert "c2VjcmV0" not in filename.read_text()
+    assert spans["echo"]["tid"] == spans["first.object_list"]["tid"]
+    assert spans["second.object_list"]["tid"] != spans["first.object_list"]["tid"]
+    assert spans["first.object_list"]["ts"] <= spans["echo"]["ts"]
+    assert spans["stage 0"]["ts"] == spans["first.object_list"]["ts"]
+    assert spans["stage 0"]["tid"] == spans["stage 1"]["tid"]
+    assert {event["tid"] for event in metadata} == {event["tid"] for event in spans.values()}